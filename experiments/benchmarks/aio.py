@@ -0,0 +1,92 @@
+import asyncio
+import argparse
+from timeit import default_timer as timer
+
+from guipilot.entities import Screen
+from guipilot.models import OCR, Detector, Transport, registry
+from server import StandInServer
+from utils import random_screen
+
+
+async def heartbeat(interval: float, lags: list[float]) -> None:
+    """Record how late the event loop wakes up a task sleeping `interval` seconds
+    """
+    while True:
+        start = timer()
+        await asyncio.sleep(interval)
+        lags.append(timer() - start - interval)
+
+
+async def run_async(screens: list[Screen]) -> tuple[float, float]:
+    """Detect and OCR screens concurrently, returns the time and the worst event loop lag in seconds
+    """
+    async def process(screen: Screen) -> None:
+        await screen.adetect()
+        await screen.aocr(batch_size=8)
+
+    lags = []
+    ticker = asyncio.create_task(heartbeat(0.001, lags))
+    start = timer()
+    await asyncio.gather(*[process(screen) for screen in screens])
+    elapsed = timer() - start
+    ticker.cancel()
+    return elapsed, max(lags, default=0.0)
+
+
+async def run_blocking(screens: list[Screen]) -> tuple[float, float]:
+    """Detect and OCR screens with the blocking API called from a coroutine, as before `aocr()`
+    """
+    async def process(screen: Screen) -> None:
+        screen.detect()
+        screen.ocr(batch_size=8)
+
+    lags = []
+    ticker = asyncio.create_task(heartbeat(0.001, lags))
+    await asyncio.sleep(0)
+    start = timer()
+    await asyncio.gather(*[process(screen) for screen in screens])
+    elapsed = timer() - start
+    await asyncio.sleep(0.002)
+    ticker.cancel()
+    return elapsed, max(lags, default=0.0)
+
+
+def texts(screens: list[Screen]) -> list:
+    return [[(widget.bbox, widget.texts, widget.text_bboxes) for widget in screen.widgets.values()] for screen in screens]
+
+
+def bench_async(n: int, rows: int, concurrency: list[int], latency: float) -> None:
+    """Compare blocking and async detection and OCR of `n` screens, against the stand-in services
+    """
+    print(f"[async client, {n} screens, {rows} widgets each, {latency * 1000:.0f} ms server latency]")
+    print("{:>12} {:>12} {:>10} {:>14} {:>8}".format("api", "concurrency", "ms", "max lag (ms)", "same"))
+    with StandInServer(latency=latency, rows=rows) as server:
+        expected = None
+        for limit in concurrency:
+            transport = Transport(pool_size=max(concurrency))
+            detector = Detector(service_url=server.url("/detect"), transport=transport, concurrency=limit, cache_size=0)
+            ocr = OCR(service_url=server.url("/ocr"), transport=transport, cache_size=0, concurrency=limit)
+            registry.register("detector", lambda: detector)
+            registry.register("ocr", lambda: ocr)
+
+            if expected is None:
+                screens = [random_screen(rows, text=True, seed=i) for i in range(n)]
+                elapsed, lag = asyncio.run(run_blocking(screens))
+                expected = texts(screens)
+                print("{:>12} {:>12} {:>10.1f} {:>14.1f} {:>8}".format("blocking", "-", elapsed * 1000, lag * 1000, "-"))
+
+            screens = [random_screen(rows, text=True, seed=i) for i in range(n)]
+            elapsed, lag = asyncio.run(run_async(screens))
+            same = texts(screens) == expected
+            print("{:>12} {:>12} {:>10.1f} {:>14.1f} {:>8}".format("async", limit, elapsed * 1000, lag * 1000, str(same)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="Async client benchmarks")
+    parser.add_argument("--screens", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=40, help="number of widgets detected on each screen")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--latency", type=float, default=0.005, help="server latency per request in seconds")
+    args = parser.parse_args()
+
+    bench_async(args.screens, args.rows, args.concurrency, args.latency)
@@ -0,0 +1,150 @@
+import os
+import random
+import argparse
+import tempfile
+
+import numpy as np
+
+from guipilot.entities import Screen
+from guipilot.models import Detector, Transport, registry
+from guipilot.models.detector.ops import box_iou
+from server import StandInServer
+from utils import measure, random_screen
+
+
+def detections(screens: list[Screen]) -> list:
+    return [(screen.table.bboxes.tolist(), screen.table.types.tolist()) for screen in screens]
+
+
+def bench_detect_many(n: int, batch_sizes: list[int], latency: float, repeat: int) -> None:
+    """Compare `detect()` per screen with batched `Screen.detect_many()`, against the stand-in detector service
+    """
+    screens = [random_screen(20, text=True, seed=i) for i in range(n)]
+
+    print(f"[detect many, {n} screens, {latency * 1000:.0f} ms server latency]")
+    print("{:>12} {:>10} {:>10} {:>10} {:>8}".format("batch size", "ms", "ms/screen", "requests", "same"))
+    with StandInServer(latency=latency) as server:
+        detector = Detector(service_url=server.url("/detect"), transport=Transport(), cache_size=0)
+        registry.register("detector", lambda: detector)
+
+        requests = server.requests
+        ms = measure(lambda: [screen.detect() for screen in screens], repeat)
+        requests = (server.requests - requests) / repeat
+        expected = detections(screens)
+        print("{:>12} {:>10.1f} {:>10.2f} {:>10.0f} {:>8}".format("per screen", ms, ms / n, requests, "-"))
+
+        for batch_size in batch_sizes:
+            requests = server.requests
+            ms = measure(lambda: Screen.detect_many(screens, batch_size), repeat)
+            requests = (server.requests - requests) / repeat
+            same = detections(screens) == expected
+            print("{:>12} {:>10.1f} {:>10.2f} {:>10.0f} {:>8}".format(batch_size, ms, ms / n, requests, str(same)))
+
+
+def bench_cache(n: int, latency: float) -> None:
+    """Detect screens cold, again with the same model, and again with a new model sharing the disk tier, 
+    as rq2 and rq4 do for the same mockups across runs
+    """
+    screens = [random_screen(20, text=True, seed=i) for i in range(n)]
+
+    print(f"[detect cache, {n} screens, {latency * 1000:.0f} ms server latency]")
+    print("{:>22} {:>10} {:>10} {:>10} {:>10} {:>8}".format("run", "ms", "requests", "hits", "disk hits", "same"))
+    with StandInServer(latency=latency) as server, tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "detector.sqlite")
+        expected = None
+        for name, new_model in {"cold": True, "warm": False, "new process": True}.items():
+            if new_model:
+                detector = Detector(service_url=server.url("/detect"), transport=Transport(), cache_path=path)
+                registry.register("detector", lambda: detector)
+            stats, requests = detector.cache.stats(), server.requests
+            ms = measure(lambda: [screen.detect() for screen in screens], 1)
+            hits = detector.cache.stats()["hits"] - stats["hits"]
+            disk_hits = detector.cache.stats()["disk_hits"] - stats["disk_hits"]
+            expected = expected or detections(screens)
+            same = detections(screens) == expected
+            print("{:>22} {:>10.1f} {:>10} {:>10} {:>10} {:>8}".format(name, ms, server.requests - requests, hits, disk_hits, str(same)))
+        print(f"hit rate: {detector.cache.stats()['hit_rate']:.1%}")
+
+
+def tall_page(height: int, width: int = 1080, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """Scroll-captured page of dark widgets in rows of 10 to 700 px, returns the image and `(n, 4)` widget bboxes
+    """
+    rng = random.Random(seed)
+    image = np.full((height, width, 3), 255, dtype=np.uint8)
+    bboxes, y = [], 8
+    while True:
+        row_height = rng.choice([rng.randint(10, 40), rng.randint(40, 200), rng.randint(200, 700)])
+        if y + row_height > height - 8: break
+        x = 8
+        while True:
+            w = rng.randint(10, 400)
+            if x + w > width - 8: break
+            image[y:y + row_height, x:x + w] = 0
+            bboxes.append([x, y, x + w, y + row_height])
+            x += w + rng.randint(8, 60)
+        y += row_height + rng.randint(8, 60)
+    return image, np.array(bboxes, dtype=np.float64)
+
+
+def bench_tiling(height: int, tile_heights: list[int], latency: float) -> None:
+    """Compare detection of a tall page at once and in tiles, with a stand-in model that runs at 640 px
+    """
+    image, expected = tall_page(height)
+    print(f"[detect tiled, 1080x{height} page, {len(expected)} widgets, {latency * 1000:.0f} ms server latency]")
+    print("{:>12} {:>10} {:>10} {:>10} {:>10} {:>10}".format("tile height", "ms", "requests", "detected", "recall", "extra"))
+    with StandInServer(latency=latency) as server:
+        for tile_height in [None] + tile_heights:
+            detector = Detector(service_url=server.url("/boxes"), transport=Transport(), cache_size=0, tile_height=tile_height)
+            requests = server.requests
+            ms = measure(lambda: detector(image), 1)
+            bboxes, _ = detector(image)
+            requests = (server.requests - requests) // 2
+
+            # widgets found with IoU >= 0.5, and detections matching no widget
+            iou = box_iou(expected, bboxes.astype(np.float64)) if len(bboxes) else np.zeros((len(expected), 0))
+            recall = (iou.max(axis=1, initial=0) >= 0.5).mean()
+            extra = len(bboxes) - (iou.max(axis=0, initial=0) >= 0.5).sum()
+            name = tile_height or "none"
+            print("{:>12} {:>10.1f} {:>10} {:>10} {:>10.1%} {:>10}".format(name, ms, requests, len(bboxes), recall, extra))
+
+
+def bench_upload(n: int, upload_sizes: list[int], latency: float, repeat: int) -> None:
+    """Compare full-resolution uploads with screenshots shrunk on the client, with a stand-in model that runs at 640 px
+    """
+    images = [tall_page(2400, seed=i)[0] for i in range(n)]
+    print(f"[detect upload size, {n} screens, {latency * 1000:.0f} ms server latency]")
+    print("{:>12} {:>10} {:>10} {:>10} {:>10} {:>10}".format("upload size", "ms", "KB/screen", "detected", "recall", "mean IoU"))
+    with StandInServer(latency=latency) as server:
+        expected = None
+        for upload_size in [None] + upload_sizes:
+            detector = Detector(service_url=server.url("/boxes"), transport=Transport(), cache_size=0, upload_size=upload_size)
+            sent = server.bytes
+            ms = measure(lambda: detector.detect_many(images), repeat)
+            kb = (server.bytes - sent) / repeat / n / 1024
+            results = [bboxes.astype(np.float64) for bboxes, _ in detector.detect_many(images)]
+            expected = expected or results
+
+            # agreement with the full-resolution upload, widgets matched with IoU >= 0.5
+            ious = [box_iou(a, b).max(axis=1, initial=0) if len(b) else np.zeros(len(a)) for a, b in zip(expected, results)]
+            ious = np.concatenate(ious)
+            recall, mean_iou = (ious >= 0.5).mean(), ious[ious >= 0.5].mean()
+            detected = sum(len(bboxes) for bboxes in results)
+            name = upload_size or "full"
+            print("{:>12} {:>10.1f} {:>10.1f} {:>10} {:>10.1%} {:>10.3f}".format(name, ms, kb, detected, recall, mean_iou))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="Detector benchmarks")
+    parser.add_argument("--screens", type=int, default=32)
+    parser.add_argument("--batch_sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--latency", type=float, default=0.005, help="server latency per request in seconds")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--page_height", type=int, default=6000, help="height of the tall page to detect in tiles")
+    parser.add_argument("--upload_sizes", type=int, nargs="+", default=[1280, 640])
+    parser.add_argument("--tile_heights", type=int, nargs="+", default=[2400, 1200, 640])
+    args = parser.parse_args()
+
+    bench_detect_many(args.screens, args.batch_sizes, args.latency, args.repeat)
+    bench_cache(args.screens, args.latency)
+    bench_tiling(args.page_height, args.tile_heights, args.latency)
+    bench_upload(args.screens, args.upload_sizes, args.latency, args.repeat)
@@ -0,0 +1,126 @@
+import os
+import sys
+import types
+import argparse
+import subprocess
+import tracemalloc
+from copy import deepcopy
+
+from guipilot.entities import Bbox, Widget, WidgetType
+from utils import measure, random_screen
+
+
+def load_widget(revision: str) -> tuple[type, type]:
+    """Load `Widget` and `WidgetType` as of a git revision of this repository, to benchmark against
+    """
+    path = "guipilot/entities/widget.py"
+    source = subprocess.run(
+        ["git", "show", f"{revision}:{path}"], 
+        cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True
+    ).stdout
+    module = types.ModuleType(f"widget_{revision}")
+    sys.modules[module.__name__] = module  # dataclasses look up the defining module
+    exec(compile(source, f"{revision}:{path}", "exec"), module.__dict__)
+    return module.Widget, module.WidgetType
+
+
+def bench_widget(n: int, repeat: int, baseline: str) -> None:
+    """Compare memory and property access costs of the `Widget` of the `baseline` revision and the slotted widget
+
+    Memory is measured right after construction and again after every geometry property was read.
+    """
+    bboxes = [Bbox(i % 1000, i % 2000, i % 1000 + 50, i % 2000 + 20) for i in range(n)]
+    print(f"[widget, {n} widgets]")
+    print("{:>10} {:>14} {:>14} {:>14} {:>14} {:>14}".format("widget", "bytes/widget", "after access", "create ms", "1st access ms", "access ms"))
+    widget_classes = {baseline: load_widget(baseline), "slotted": (Widget, WidgetType)}
+    for name, (cls, widget_type) in widget_classes.items():
+        def access() -> None:
+            for widget in widgets:
+                widget.width, widget.height, widget.area, widget.center
+
+        tracemalloc.start()
+        widgets = [cls(type=widget_type.TEXT_VIEW, bbox=bbox) for bbox in bboxes]
+        size = tracemalloc.get_traced_memory()[0] / n
+        access()
+        size_accessed = tracemalloc.get_traced_memory()[0] / n
+        tracemalloc.stop()
+
+        widgets = [cls(type=widget_type.TEXT_VIEW, bbox=bbox) for bbox in bboxes]
+        t_create = measure(lambda: [cls(type=widget_type.TEXT_VIEW, bbox=bbox) for bbox in bboxes], repeat)
+        t_first = measure(access, 1)
+        t_access = measure(access, repeat)
+        print("{:>10} {:>14.0f} {:>14.0f} {:>14.2f} {:>14.2f} {:>14.2f}".format(name, size, size_accessed, t_create, t_first, t_access))
+
+
+def bench_clone(n: int, repeat: int) -> None:
+    """Compare `deepcopy` and copy-on-write `Screen.clone()` of a screen, with and without a write
+    """
+    screen = random_screen(n)
+
+    def write(clone) -> None:
+        clone.edit_image()[100:200, 100:200] = 0
+        clone.widgets[0].bbox = clone.widgets[1].bbox
+
+    def traced(fn) -> float:
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return peak / 2**20
+
+    print(f"[clone, {n} widgets, image {screen.image.shape}]")
+    print("{:>16} {:>10} {:>10}".format("copy", "ms", "peak MB"))
+    methods = {
+        "deepcopy": lambda: deepcopy(screen),
+        "clone": lambda: screen.clone(),
+        "deepcopy+write": lambda: write(deepcopy(screen)),
+        "clone+write": lambda: write(screen.clone())
+    }
+    for name, fn in methods.items():
+        print("{:>16} {:>10.3f} {:>10.2f}".format(name, measure(fn, repeat), traced(fn)))
+
+
+def check_table() -> None:
+    """Check that widgets deleted from or replaced on a screen no longer write to its table, 
+    that widget bboxes agree with the table, and that texts changed in place are not shared by clones
+    """
+    def stored(screen, id: int) -> tuple:
+        return tuple(screen.table.bboxes[list(screen.widgets).index(id)].tolist())
+
+    screen = random_screen(5)
+    deleted, replaced = screen.widgets[1], screen.widgets[2]
+    del screen.widgets[1]
+    screen.widgets[2] = Widget(type=WidgetType.TEXT_VIEW, bbox=Bbox(1, 2, 3, 4))
+    bboxes, texts = screen.table.bboxes.copy(), [list(texts) for texts in screen.table.texts]
+    for widget in (deleted, replaced):
+        widget.bbox, widget.texts = Bbox(0, 0, 1, 1), ["stale"]
+    assert (screen.table.bboxes == bboxes).all() and screen.table.texts == texts, "unbound widget wrote to the table"
+
+    screen.widgets[3].bbox = Bbox(10.7, 20.2, 30.9, 40.5)
+    screen.widgets[9] = Widget(type=WidgetType.TEXT_VIEW, bbox=Bbox(1.5, 2.5, 3.5, 4.5))
+    for id in (3, 9):
+        assert tuple(screen.widgets[id].bbox) == stored(screen, id), "widget and table bboxes differ"
+
+    # texts changed in place on either side of a clone
+    source = screen.widgets[3]
+    clone = screen.clone()
+    clone.widgets[3].texts.append("clone")
+    source.texts.append("source")
+    assert screen.widgets[3].texts == ["source"] and clone.widgets[3].texts == ["clone"], "clone shares texts"
+    clone.widgets[4].bbox = Bbox(0, 0, 1, 1)
+    row = list(clone.widgets).index(3)
+    assert clone.widgets[3].texts is clone.table.texts[row], "widget texts are not the table's"
+    print("[table] ok")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="Entity benchmarks")
+    parser.add_argument("--widgets", type=int, default=100_000)
+    parser.add_argument("--screen_widgets", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", required=True, help="git revision of the widget to compare against")
+    args = parser.parse_args()
+
+    check_table()
+    bench_widget(args.widgets, args.repeat, args.baseline)
+    bench_clone(args.screen_widgets, args.repeat)
@@ -0,0 +1,54 @@
+import sys
+import argparse
+import subprocess
+
+
+HEAVY_MODULES = ["torch", "ultralytics", "paddleocr", "paddle", "requests", "asyncio"]
+
+
+def import_time(module: str) -> tuple[float, list[tuple[float, str]], list[str]]:
+    """Import a module in a fresh interpreter
+
+    Returns:
+        total import time in ms, (cumulative ms, module) of each import it triggered, heavy modules imported
+    """
+    code = f"import sys; import {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, check=True)
+
+    # modules imported by site before `module` are excluded, parent packages are imported at top level
+    packages = {".".join(module.split(".")[:i + 1]) for i in range(module.count(".") + 1)}
+    total, imports = 0, []
+    for line in process.stderr.splitlines()[::-1]:
+        if not line.startswith("import time:") or "cumulative" in line: continue
+        _, cumulative, name = line.split("|")
+        depth = len(name) - len(name.lstrip()) - 1
+        if depth == 0 and name.strip() not in packages: break
+        if depth == 0: total += int(cumulative) / 1000
+        imports.append((int(cumulative) / 1000, name.strip()))
+
+    heavy = [m for m in process.stdout.strip().split(",") if m]
+    return total, imports, heavy
+
+
+def bench_import(module: str, budget: float, repeat: int) -> bool:
+    """Report the best import time of a module out of `repeat` runs, and whether it is within budget
+    """
+    total, imports, heavy = min((import_time(module) for _ in range(repeat)), key=lambda x: x[0])
+    print(f"[import {module}]")
+    print("{:>10} {}".format("ms", "slowest imports, cumulative"))
+    for ms, name in sorted(imports, reverse=True)[:10]:
+        print("{:>10.1f} {}".format(ms, name))
+    print("{:>10.1f} total, budget {:.0f} ms".format(total, budget))
+    print("heavy modules imported:", ", ".join(heavy) or "none")
+    return total <= budget and not heavy
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="Import time benchmark")
+    parser.add_argument("--module", type=str, default="guipilot.entities")
+    parser.add_argument("--budget", type=float, default=200, help="import time budget in ms")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    ok = bench_import(args.module, args.budget, args.repeat)
+    sys.exit(0 if ok else 1)
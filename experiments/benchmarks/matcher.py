@@ -0,0 +1,183 @@
+import argparse
+import tracemalloc
+
+from guipilot.matcher import GUIPilotV2, GVT
+from utils import random_screen, perturb_screen, measure
+
+
+def bench_match_scores(sizes: list[int], repeat: int) -> None:
+    """Time the vectorized score matrix against the reference, see tests/test_matcher_equivalence.py
+    """
+    matcher = GUIPilotV2()
+    print("[match scores]")
+    print("{:>8} {:>14} {:>14} {:>10}".format("widgets", "reference ms", "vectorized ms", "speedup"))
+    for n in sizes:
+        screen_i = random_screen(n, seed=n)
+        screen_j = perturb_screen(screen_i, seed=n)
+
+        t_ref = measure(lambda: matcher._calculate_match_scores_reference(screen_i, screen_j), repeat)
+        t_vec = measure(lambda: matcher._calculate_match_scores(screen_i, screen_j), repeat)
+        print("{:>8} {:>14.2f} {:>14.2f} {:>9.1f}x".format(n, t_ref, t_vec, t_ref / t_vec))
+
+
+def bench_alignment(sizes: list[int], repeat: int) -> None:
+    """Time the row-vectorized alignment DP against the reference, see tests/test_matcher_equivalence.py
+    """
+    matcher = GUIPilotV2()
+    print("[alignment]")
+    print("{:>8} {:>14} {:>14} {:>10}".format("widgets", "reference ms", "vectorized ms", "speedup"))
+    for n in sizes:
+        screen_i = random_screen(n, seed=n)
+        screen_j = perturb_screen(screen_i, seed=n)
+        scores = matcher._calculate_match_scores(screen_i, screen_j)
+        t_ref = measure(lambda: matcher._find_longest_matching_subsequence_reference(scores), repeat)
+        t_vec = measure(lambda: matcher._find_longest_matching_subsequence(scores), repeat)
+        print("{:>8} {:>14.2f} {:>14.2f} {:>9.1f}x".format(n, t_ref, t_vec, t_ref / t_vec))
+
+
+def bench_banded(sizes: list[int], repeat: int) -> None:
+    """Compare banded matching against full matching
+    """
+    full = GUIPilotV2()
+    banded = {
+        "band=8": GUIPilotV2(band=8),
+        "band_y=0.05": GUIPilotV2(band_y=0.05),
+        "band=8+verify": GUIPilotV2(band=8, verify_band=True),
+    }
+    print("[banded matching]")
+    print("{:>8} {:>14} {:>10} {:>10} {:>10} {:>8}".format("widgets", "mode", "ms", "full ms", "same pairs", "touched"))
+    for n in sizes:
+        screen_i = random_screen(n, seed=n)
+        screen_j = perturb_screen(screen_i, seed=n)
+        expected, _, _ = full.match(screen_i, screen_j)
+        t_full = measure(lambda: full.match(screen_i, screen_j), repeat)
+        for name, matcher in banded.items():
+            actual, _, _, touched = matcher.match_banded(screen_i, screen_j)
+            t_band = measure(lambda: matcher.match(screen_i, screen_j), repeat)
+            same = len(set(actual) & set(expected)) / max(len(expected), 1)
+            print("{:>8} {:>14} {:>10.2f} {:>10.2f} {:>10.2%} {:>8}".format(n, name, t_band, t_full, same, str(touched)))
+
+
+def bench_linear_space(sizes: list[int], max_cells: int) -> None:
+    """Compare peak memory and time of linear-space matching against dense matching
+    """
+    dense, linear = GUIPilotV2(), GUIPilotV2(max_cells=max_cells)
+    print(f"[linear space, max_cells={max_cells}]")
+    print("{:>8} {:>10} {:>10} {:>10} {:>10} {:>6}".format("widgets", "dense MB", "linear MB", "dense ms", "linear ms", "same"))
+    for n in sizes:
+        screen_i = random_screen(n, height=100 * n, seed=n)
+        screen_j = perturb_screen(screen_i, seed=n)
+        results, peaks = [], []
+        for matcher in (dense, linear):
+            tracemalloc.start()
+            results.append(matcher.match(screen_i, screen_j))
+            peaks.append(tracemalloc.get_traced_memory()[1] / 2**20)
+            tracemalloc.stop()
+        same = results[0][0] == results[1][0]
+        print("{:>8} {:>10.1f} {:>10.1f} {:>10} {:>10} {:>6}".format(n, *peaks, results[0][2], results[1][2], str(same)))
+
+
+def bench_sparse(sizes: list[int], max_distance: float, repeat: int) -> None:
+    """Compare matching on spatially-pruned candidate pairs against matching on all pairs
+    """
+    print(f"[sparse candidates, max_distance={max_distance}]")
+    print("{:>8} {:>12} {:>10} {:>10} {:>10} {:>10}".format("widgets", "candidates", "matcher", "dense ms", "sparse ms", "same pairs"))
+    for n in sizes:
+        screen_i = random_screen(n, seed=n)
+        screen_j = perturb_screen(screen_i, seed=n)
+        matchers = {"guipilot": (GUIPilotV2(), GUIPilotV2(max_distance=max_distance))}
+
+        points_i, points_j = (GUIPilotV2()._get_features(screen)[0][:, :2] for screen in (screen_i, screen_j))
+        rows, _ = GUIPilotV2()._find_candidates(points_i, points_j, max_distance)
+        candidates = len(rows) / (len(points_i) * len(points_j))
+
+        for name, (dense, sparse) in matchers.items():
+            expected, _, _ = dense.match(screen_i, screen_j)
+            actual, _, _ = sparse.match(screen_i, screen_j)
+            t_dense = measure(lambda: dense.match(screen_i, screen_j), repeat)
+            t_sparse = measure(lambda: sparse.match(screen_i, screen_j), repeat)
+            same = len(set(actual) & set(expected)) / max(len(expected), 1)
+            print("{:>8} {:>12.1%} {:>10} {:>10.2f} {:>10.2f} {:>10.2%}".format(n, candidates, name, t_dense, t_sparse, same))
+
+def bench_gvt_reuse(sizes: list[int], mutants: int) -> None:
+    """Time matching many mutants against the same screen with GVT, with and without reused inputs
+    """
+    print(f"[gvt reuse, {mutants} mutants]")
+    print("{:>8} {:>12} {:>12} {:>14}".format("widgets", "cold ms", "cached ms", "precomputed ms"))
+    for n in sizes:
+        screen = random_screen(n, seed=n)
+        screens = [perturb_screen(screen, seed=seed) for seed in range(mutants)]
+        matcher = GVT(0.1)
+        points = matcher._norm_xywh_array(screen)
+
+        def run(precomputed: bool) -> None:
+            for mutant in screens:
+                if precomputed: matcher.match(mutant, screen, points_j=points)
+                else: matcher.match(mutant, screen)
+
+        matcher._index_cache.clear()
+        t_cold = measure(lambda: run(False), 1)
+        t_cached = measure(lambda: run(False), 3)
+        t_precomputed = measure(lambda: run(True), 3)
+        print("{:>8} {:>12.2f} {:>12.2f} {:>14.2f}".format(n, t_cold, t_cached, t_precomputed))
+
+
+def bench_match_many(sizes: list[int], num_pairs: int) -> None:
+    """Compare match_many against calling match on each pair
+    """
+    print(f"[match_many, {num_pairs} pairs]")
+    print("{:>8} {:>10} {:>10} {:>10} {:>10}".format("widgets", "matcher", "serial ms", "batch ms", "speedup"))
+    for n in sizes:
+        screen_pairs = []
+        for seed in range(num_pairs):
+            screen = random_screen(n, seed=seed)
+            screen_pairs.append((screen, perturb_screen(screen, seed=seed)))
+
+        for name, matcher in {"guipilot": GUIPilotV2(), "gvt": GVT(0.1)}.items():
+            t_serial = measure(lambda: [matcher.match(screen_i, screen_j) for screen_i, screen_j in screen_pairs], 1)
+            t_batch = measure(lambda: matcher.match_many(screen_pairs), 1)
+            print("{:>8} {:>10} {:>10.2f} {:>10.2f} {:>9.1f}x".format(n, name, t_serial, t_batch, t_serial / t_batch))
+
+
+def bench_match_many_memory(small: int, large: int, num_pairs: int) -> None:
+    """Compare peak memory of match_many on mixed screen sizes, batched by pair count only vs. capped by cells
+    """
+    screen_pairs = []
+    for seed in range(num_pairs):
+        n = large if seed % 8 == 0 else small
+        screen = random_screen(n, height=max(2400, 4 * n), seed=seed)
+        screen_pairs.append((screen, perturb_screen(screen, seed=seed)))
+
+    print(f"[match_many memory, {num_pairs} pairs of {small} and {large} widgets]")
+    print("{:>10} {:>12} {:>10} {:>10} {:>6}".format("matcher", "batch cells", "peak MB", "ms", "same"))
+    for name, matcher in {"guipilot": GUIPilotV2(), "gvt": GVT(0.1)}.items():
+        expected = [x[0] for x in matcher.match_many(screen_pairs, batch_cells=2**63)]
+        for batch_cells in (None, 2**20):
+            tracemalloc.start()
+            results = matcher.match_many(screen_pairs, batch_cells=batch_cells or 2**63)
+            peak = tracemalloc.get_traced_memory()[1] / 2**20
+            tracemalloc.stop()
+            ms = measure(lambda: matcher.match_many(screen_pairs, batch_cells=batch_cells or 2**63), 1)
+            same = [x[0] for x in results] == expected
+            print("{:>10} {:>12} {:>10.1f} {:>10.1f} {:>6}".format(name, batch_cells or "-", peak, ms, str(same)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="Matcher benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 300])
+    parser.add_argument("--align_sizes", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--linear_sizes", type=int, nargs="+", default=[1000, 3000])
+    parser.add_argument("--max_cells", type=int, default=2**16)
+    parser.add_argument("--max_distance", type=float, default=0.1)
+    parser.add_argument("--sparse_sizes", type=int, nargs="+", default=[200, 500, 1000, 2000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    bench_match_scores(args.sizes, args.repeat)
+    bench_alignment(args.align_sizes, args.repeat)
+    bench_banded(args.align_sizes, args.repeat)
+    bench_linear_space(args.linear_sizes, args.max_cells)
+    bench_sparse(args.sparse_sizes, args.max_distance, args.repeat)
+    bench_gvt_reuse(args.sizes, mutants=20)
+    bench_match_many(args.sizes, num_pairs=100)
+    bench_match_many_memory(50, 1000, num_pairs=32)
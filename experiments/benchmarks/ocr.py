@@ -0,0 +1,155 @@
+import os
+import argparse
+import tempfile
+
+import cv2
+import numpy as np
+
+from guipilot.models import OCR, Transport, registry
+from guipilot.entities.screen import _assign_texts
+from guipilot.entities.table import to_pixels
+from server import StandInServer
+from utils import measure, random_screen
+
+
+def bench_batch(n: int, batch_sizes: list[int], latency: float, repeat: int) -> None:
+    """Compare a request per widget with batched `Screen.ocr()`, against the stand-in OCR service
+    """
+    screen = random_screen(n, text=True)
+    image = cv2.cvtColor(screen.image, cv2.COLOR_BGR2RGB)
+    crops = [image[ymin:ymax, xmin:xmax] for xmin, ymin, xmax, ymax in to_pixels(screen.table.bboxes).tolist()]
+
+    print(f"[ocr batch, {n} widgets, {latency * 1000:.0f} ms server latency]")
+    print("{:>12} {:>10} {:>10} {:>10} {:>8}".format("batch size", "ms", "ms/widget", "requests", "same"))
+    with StandInServer(latency=latency) as server:
+        ocr = OCR(service_url=server.url("/ocr"), transport=Transport(), cache_size=0)
+        registry.register("ocr", lambda: ocr)
+
+        requests = server.requests
+        ms = measure(lambda: [ocr(crop) for crop in crops], repeat)
+        expected = [ocr(crop) for crop in crops]
+        requests = (server.requests - requests - n) / repeat
+        print("{:>12} {:>10.1f} {:>10.2f} {:>10.0f} {:>8}".format("per widget", ms, ms / n, requests, "-"))
+
+        for batch_size in batch_sizes:
+            requests = server.requests
+            ms = measure(lambda: screen.ocr(batch_size), repeat)
+            requests = (server.requests - requests) / repeat
+            same = [(widget.texts, widget.text_bboxes) for widget in screen.widgets.values()] == expected
+            print("{:>12} {:>10.1f} {:>10.2f} {:>10.0f} {:>8}".format(batch_size, ms, ms / n, requests, str(same)))
+
+
+def bench_workers(n: int, workers: list[int], batch_sizes: list[int], latency: float, repeat: int) -> None:
+    """Compare serial and concurrent batches of `Screen.ocr()`, against the stand-in OCR service
+    """
+    screen = random_screen(n, text=True)
+
+    print(f"[ocr workers, {n} widgets, {latency * 1000:.0f} ms server latency]")
+    print("{:>12} {:>8} {:>10} {:>10} {:>8}".format("batch size", "workers", "ms", "speedup", "same"))
+    transport = Transport(pool_size=max(workers))
+    with StandInServer(latency=latency) as server, OCR(service_url=server.url("/ocr"), transport=transport, cache_size=0) as ocr:
+        registry.register("ocr", lambda: ocr)
+        screen.ocr()
+        expected = [(widget.texts, widget.text_bboxes) for widget in screen.widgets.values()]
+
+        for batch_size in batch_sizes:
+            serial = None
+            for count in workers:
+                ms = measure(lambda: screen.ocr(batch_size, workers=count), repeat)
+                serial = serial or ms
+                same = [(widget.texts, widget.text_bboxes) for widget in screen.widgets.values()] == expected
+                print("{:>12} {:>8} {:>10.1f} {:>10.1f} {:>8}".format(batch_size, count, ms, serial / ms, str(same)))
+
+
+def bench_assign(n: int, k: int, repeat: int) -> None:
+    """Time the spatial join of `k` full-screen texts to `n` widgets, used by `Screen.ocr(mode="fullscreen")`
+    """
+    screen = random_screen(n)
+    rng = np.random.default_rng(0)
+    xmin, ymin = rng.integers(0, 1000, k), rng.integers(0, 2350, k)
+    text_bboxes = np.stack([xmin, ymin, xmin + rng.integers(10, 80, k), ymin + rng.integers(10, 50, k)], axis=1)
+    texts = [f"text {i}" for i in range(k)]
+
+    ms = measure(lambda: _assign_texts(screen.table.bboxes, texts, text_bboxes.tolist(), 0.5), repeat)
+    assigned = sum(len(widget_texts) for widget_texts, _ in _assign_texts(screen.table.bboxes, texts, text_bboxes.tolist(), 0.5))
+    print(f"[ocr fullscreen assignment, {n} widgets, {k} texts]")
+    print("{:>10} {:>10}".format("ms", "assigned"))
+    print("{:>10.2f} {:>10}".format(ms, assigned))
+
+
+def bench_cache(n: int, p: float, latency: float) -> None:
+    """OCR a screen, a copy with a fraction `p` of widgets repainted, and the screen again with a new model
+    sharing the disk tier, as the rq1 loop does across runs
+    """
+    screen = random_screen(n, text=True)
+    mutant = screen.clone()
+    for widget in list(mutant.widgets.values())[::max(int(1 / p), 1)]:
+        xmin, ymin, xmax, ymax = widget.bbox
+        mutant.edit_image()[ymin:ymax, xmin:xmax] = 0
+
+    print(f"[ocr cache, {n} widgets, {p:.0%} changed, {latency * 1000:.0f} ms server latency]")
+    print("{:>22} {:>10} {:>10} {:>10} {:>10}".format("run", "ms", "requests", "hits", "disk hits"))
+    with StandInServer(latency=latency) as server, tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "ocr.sqlite")
+        runs = {
+            "screen, cold": (screen, True),
+            "mutant": (mutant, False),
+            "screen, new process": (screen, True)
+        }
+        for name, (target, new_model) in runs.items():
+            if new_model:
+                ocr = OCR(service_url=server.url("/ocr"), transport=Transport(), cache_path=path)
+                registry.register("ocr", lambda: ocr)
+            stats, requests = ocr.cache.stats(), server.requests
+            ms = measure(lambda: target.clone().ocr(), 1)
+            hits = ocr.cache.stats()["hits"] - stats["hits"]
+            disk_hits = ocr.cache.stats()["disk_hits"] - stats["disk_hits"]
+            print("{:>22} {:>10.1f} {:>10} {:>10} {:>10}".format(name, ms, server.requests - requests, hits, disk_hits))
+
+
+def bench_incremental(n: int, p: float, latency: float, repeat: int) -> None:
+    """Compare full and incremental OCR of a copy of a screen with a fraction `p` of widgets repainted
+    """
+    screen = random_screen(n, text=True)
+    mutant = screen.clone()
+    for widget in list(mutant.widgets.values())[::max(int(1 / p), 1)]:
+        mutant.edit_image(widget.bbox)[:] = 0
+
+    print(f"[ocr incremental, {n} widgets, {p:.0%} changed, {latency * 1000:.0f} ms server latency]")
+    print("{:>12} {:>10} {:>10} {:>10} {:>8}".format("ocr", "ms", "widgets", "requests", "same"))
+    with StandInServer(latency=latency) as server:
+        ocr = OCR(service_url=server.url("/ocr"), transport=Transport(), cache_size=0)
+        registry.register("ocr", lambda: ocr)
+        screen.ocr()
+
+        expected = mutant.clone()
+        expected.ocr()
+        expected = [(widget.texts, widget.text_bboxes) for widget in expected.widgets.values()]
+        runs = {
+            "full": lambda target: target.ocr(),
+            "incremental": lambda target: target.ocr(incremental=True, reference=screen)
+        }
+        for name, run in runs.items():
+            requests = server.requests
+            ms = measure(lambda: run(mutant), repeat)
+            requests = (server.requests - requests) / repeat
+            widgets = n - mutant._unchanged(screen).sum() if name == "incremental" else n
+            same = [(widget.texts, widget.text_bboxes) for widget in mutant.widgets.values()] == expected
+            print("{:>12} {:>10.1f} {:>10} {:>10.0f} {:>8}".format(name, ms, widgets, requests, str(same)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="OCR benchmarks")
+    parser.add_argument("--widgets", type=int, default=200)
+    parser.add_argument("--batch_sizes", type=int, nargs="+", default=[1, 8, 32, 256])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--texts", type=int, default=300, help="number of full-screen texts to assign")
+    parser.add_argument("--latency", type=float, default=0.002, help="server latency per request in seconds")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    bench_batch(args.widgets, args.batch_sizes, args.latency, args.repeat)
+    bench_workers(args.widgets, args.workers, [1, 8], 0.005, args.repeat)
+    bench_assign(args.widgets, args.texts, args.repeat)
+    bench_cache(args.widgets, 0.05, args.latency)
+    bench_incremental(args.widgets, 0.05, args.latency, args.repeat)
@@ -0,0 +1,163 @@
+import json
+import time
+import base64
+import argparse
+import threading
+from urllib.parse import parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+
+from guipilot.models.transport import decode_image, decode_images
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Stand-in for the OCR and detector services, with the same request and response formats
+
+    Accepts base64 JPEG forms and the binary encodings of `guipilot.models.transport.encode_image()`.
+    `/ocr` returns one text per image describing its size, `/detect` splits the image into
+    `server.rows` full-width rows. `/boxes` is a detector of the dark shapes on an image, run at 
+    `server.imgsz` resolution as a model would be. The `/batch` routes run the route on each image 
+    of a request. 
+    Each request is delayed by `server.latency` seconds.
+    """
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def setup(self) -> None:
+        super().setup()
+        with self.server.lock: self.server.connections += 1
+
+    def _read_images(self) -> list[np.ndarray]:
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        with self.server.lock: self.server.bytes += len(body)
+        if self.headers.get("Content-Type") == "application/octet-stream":
+            if "X-Image-Sizes" in self.headers: return decode_images(body, self.headers)
+            return [decode_image(body, self.headers)]
+
+        form = parse_qs(body.decode("utf-8"))
+        buffers = [np.frombuffer(base64.b64decode(image), dtype=np.uint8) for image in form.get("image_array", [])]
+        return [cv2.imdecode(buffer, cv2.IMREAD_COLOR) for buffer in buffers]
+
+    def _ocr(self, image: np.ndarray) -> dict:
+        height, width = image.shape[:2]
+        return {"text": [f"{width}x{height}"], "box": [[0, 0, width, height]]}
+
+    def _detect(self, image: np.ndarray) -> dict:
+        height, width = image.shape[:2]
+        ys = np.linspace(0, height, self.server.rows + 1).astype(int)
+        boxes = [[0, int(ymin), width, int(ymax)] for ymin, ymax in zip(ys[:-1], ys[1:])]
+        return {"class": ["textview"] * len(boxes), "box": boxes}
+
+    def _boxes(self, image: np.ndarray) -> dict:
+        # like a detector with a `server.imgsz` input, the image is downsized and details 
+        # smaller than a few pixels at that size are lost
+        height, width = image.shape[:2]
+        ratio = min(self.server.imgsz / max(height, width), 1.0)
+        small = cv2.resize(image, (round(width * ratio), round(height * ratio)), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        _, mask = cv2.threshold(gray, 128, 255, cv2.THRESH_BINARY_INV)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, np.ones((3, 3), np.uint8))
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        boxes = []
+        for contour in contours:
+            x, y, w, h = cv2.boundingRect(contour)
+            boxes.append([x / ratio, y / ratio, min((x + w) / ratio, width), min((y + h) / ratio, height)])
+        return {"class": ["imageview"] * len(boxes), "box": boxes}
+
+    def _ocr_batch(self, images: list[np.ndarray]) -> dict:
+        results = [self._ocr(image) for image in images]
+        return {"text": [result["text"] for result in results], "box": [result["box"] for result in results]}
+
+    def _detect_batch(self, images: list[np.ndarray]) -> dict:
+        results = [self._detect(image) for image in images]
+        return {"class": [result["class"] for result in results], "box": [result["box"] for result in results]}
+
+    def _boxes_batch(self, images: list[np.ndarray]) -> dict:
+        results = [self._boxes(image) for image in images]
+        return {"class": [result["class"] for result in results], "box": [result["box"] for result in results]}
+
+    def do_POST(self) -> None:
+        routes = {"/ocr": self._ocr, "/detect": self._detect, "/boxes": self._boxes}
+        batch_routes = {"/ocr/batch": self._ocr_batch, "/detect/batch": self._detect_batch, "/boxes/batch": self._boxes_batch}
+        if self.path not in routes and self.path not in batch_routes:
+            self.send_error(404)
+            return
+
+        images = self._read_images()
+        time.sleep(self.server.latency)
+        result = batch_routes[self.path](images) if self.path in batch_routes else routes[self.path](images[0])
+        body = json.dumps(result).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        with self.server.lock: self.server.requests += 1  # counted before the client can see the response
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StandInServer():
+    """Run the stand-in services in a background thread
+
+    Example:
+        with StandInServer(latency=0.002) as server:
+            ocr = OCR(service_url=server.url("/ocr"))
+    """
+    def __init__(
+        self, 
+        host: str = "127.0.0.1", 
+        port: int = 0, 
+        latency: float = 0.0, 
+        rows: int = 20, 
+        imgsz: int = 640
+    ) -> None:
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.server.latency, self.server.rows, self.server.imgsz = latency, rows, imgsz
+        self.server.lock, self.server.requests, self.server.connections, self.server.bytes = threading.Lock(), 0, 0, 0
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def url(self, path: str) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}{path}"
+
+    @property
+    def requests(self) -> int:
+        """Number of requests served
+        """
+        return self.server.requests
+
+    @property
+    def bytes(self) -> int:
+        """Number of request body bytes received
+        """
+        return self.server.bytes
+
+    @property
+    def connections(self) -> int:
+        """Number of connections accepted
+        """
+        return self.server.connections
+
+    def __enter__(self) -> "StandInServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="Stand-in OCR and detector services")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.0, help="delay per request in seconds")
+    args = parser.parse_args()
+
+    with StandInServer(port=args.port, latency=args.latency) as server:
+        print(f"serving {server.url('/ocr')} and {server.url('/detect')}")
+        server.thread.join()
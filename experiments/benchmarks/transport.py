@@ -0,0 +1,83 @@
+import base64
+import argparse
+
+import cv2
+import requests
+import numpy as np
+
+from guipilot.entities.table import to_pixels
+from guipilot.models import OCR, Transport
+from guipilot.models.transport import ENCODINGS, encode_image, decode_image
+from server import StandInServer
+from utils import measure, random_screen
+
+
+def post_per_call(url: str, image: np.ndarray) -> dict:
+    """Previous client path: a new connection per request
+    """
+    _, buffer = cv2.imencode(".jpg", image)
+    img_base64 = base64.b64encode(buffer).decode('utf-8')
+    return requests.post(url, data={"image_array": img_base64}).json()
+
+
+def bench_transport(n: int, latency: float, repeat: int) -> None:
+    """Compare a connection per request with the pooled transport, for OCR of the `n` widgets of a screen
+    """
+    screen = random_screen(n, text=True)
+    crops = [screen.image[ymin:ymax, xmin:xmax] for xmin, ymin, xmax, ymax in to_pixels(screen.table.bboxes).tolist()]
+
+    print(f"[transport, {n} widgets, {latency * 1000:.0f} ms server latency]")
+    print("{:>12} {:>10} {:>10} {:>12}".format("client", "ms", "ms/req", "connections"))
+    with StandInServer(latency=latency) as server:
+        url = server.url("/ocr")
+        def pooled() -> None:
+            ocr = OCR(service_url=url, transport=Transport(), cache_size=0)
+            for crop in crops: ocr(crop)
+
+        clients = {
+            "per-call": lambda: [post_per_call(url, crop) for crop in crops],
+            "pooled": pooled
+        }
+        for name, fn in clients.items():
+            connections = server.connections
+            ms = measure(fn, repeat)
+            connections = (server.connections - connections) / repeat
+            print("{:>12} {:>10.1f} {:>10.2f} {:>12.0f}".format(name, ms, ms / n, connections))
+
+
+def bench_encoding(n: int, latency: float, repeat: int) -> None:
+    """Compare image encodings sent to the OCR service, for the `n` widgets of a screen
+    """
+    screen = random_screen(n, text=True)
+    crops = [screen.image[ymin:ymax, xmin:xmax] for xmin, ymin, xmax, ymax in to_pixels(screen.table.bboxes).tolist()]
+
+    print(f"[encoding, {n} widgets, {latency * 1000:.0f} ms server latency]")
+    print("{:>10} {:>12} {:>10} {:>10} {:>14}".format("encoding", "KB on wire", "ms", "ms/req", "max pixel err"))
+    with StandInServer(latency=latency) as server:
+        for encoding in ENCODINGS:
+            ocr = OCR(service_url=server.url("/ocr"), transport=Transport(), encoding=encoding, cache_size=0)
+            sent = server.bytes
+            ms = measure(lambda: [ocr(crop) for crop in crops], repeat)
+            sent = (server.bytes - sent) / repeat / 1024
+
+            error = 0
+            for crop in crops:
+                request = encode_image(crop, encoding)
+                if encoding == "jpeg":
+                    buffer = np.frombuffer(base64.b64decode(request["data"]["image_array"]), dtype=np.uint8)
+                    decoded = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+                else:
+                    decoded = decode_image(request["data"], request["headers"])
+                error = max(error, int(np.abs(decoded.astype(int) - crop).max()))
+            print("{:>10} {:>12.1f} {:>10.1f} {:>10.2f} {:>14}".format(encoding, sent, ms, ms / n, error))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="Model service transport benchmarks")
+    parser.add_argument("--widgets", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0, help="server latency per request in seconds")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    bench_transport(args.widgets, args.latency, args.repeat)
+    bench_encoding(args.widgets, args.latency, args.repeat)
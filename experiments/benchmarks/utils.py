@@ -0,0 +1,64 @@
+import random
+import string
+from timeit import default_timer as timer
+from typing import Callable
+
+import cv2
+import numpy as np
+
+from guipilot.entities import Bbox, Widget, WidgetType, Screen
+
+
+def random_screen(n: int, height: int = 2400, width: int = 1080, seed: int = 0, text: bool = False) -> Screen:
+    """Generate a screen with `n` random, y-sorted widgets on a blank image
+
+    If `text`, a random word is drawn in each widget, so that crops look like screenshot text.
+    """
+    rng = random.Random(seed)
+    widget_types = list(WidgetType)
+    bboxes = []
+    for _ in range(n):
+        w, h = rng.randint(20, width // 2), rng.randint(20, 200)
+        xmin, ymin = rng.randint(0, width - w), rng.randint(0, height - h)
+        bboxes.append(Bbox(xmin, ymin, xmin + w, ymin + h))
+
+    bboxes.sort(key=lambda bbox: (bbox.ymin, bbox.xmin))
+    widgets = {
+        i: Widget(type=rng.choice(widget_types), bbox=bbox)
+        for i, bbox in enumerate(bboxes)
+    }
+    image = np.full((height, width, 3), 255, dtype=np.uint8)
+    if text:
+        for widget in widgets.values():
+            xmin, ymin, xmax, ymax = widget.bbox
+            word = "".join(rng.choice(string.ascii_letters) for _ in range(rng.randint(3, 12)))
+            cv2.putText(image, word, (xmin + 2, (ymin + ymax) // 2), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 1)
+    return Screen(image, widgets)
+
+
+def perturb_screen(screen: Screen, p: float = 0.1, max_shift: int = 30, seed: int = 0) -> Screen:
+    """Copy a screen, jitter every widget and drop a fraction `p` of them
+    """
+    rng = random.Random(seed)
+    height, width, _ = screen.image.shape
+    widgets = {}
+    for id, widget in screen.widgets.items():
+        if rng.random() < p: continue
+        dx, dy = rng.randint(-max_shift, max_shift), rng.randint(-max_shift, max_shift)
+        xmin, ymin, xmax, ymax = widget.bbox
+        dx = min(max(dx, -xmin), width - xmax)
+        dy = min(max(dy, -ymin), height - ymax)
+        widgets[id] = Widget(type=widget.type, bbox=Bbox(xmin + dx, ymin + dy, xmax + dx, ymax + dy))
+
+    return Screen(screen.image.copy(), widgets)
+
+
+def measure(fn: Callable, repeat: int = 5) -> float:
+    """Best wall-clock time of `fn()` over `repeat` runs, in milliseconds
+    """
+    times = []
+    for _ in range(repeat):
+        start_time = timer()
+        fn()
+        times.append(timer() - start_time)
+    return min(times) * 1000
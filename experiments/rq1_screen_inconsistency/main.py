@@ -3,7 +3,6 @@ import csv
 import glob
 import warnings
 import random
-from copy import deepcopy
 from typing import Callable
 
 from dotenv import load_dotenv
@@ -16,7 +15,8 @@ from guipilot.matcher import (
 
 from guipilot.checker import (
     ScreenChecker,
-    GVT as GVTChecker
+    GVT as GVTChecker,
+    required_text_types
 )
 
 from guipilot.entities import Screen
@@ -94,8 +94,14 @@ if __name__ == "__main__":
         "gvt": GVTChecker()
     }
 
+    # only OCR widgets whose text is checked
+    ocr_types = required_text_types(checkers.values())
+
     writer = csv.writer(open(f"./evaluation.csv", "w"))
-    writer.writerow(["id", "mutation", "matcher", "checker", "cls_tp", "tp", "fp", "fn", "match_time", "check_time"])
+    writer.writerow([
+        "id", "mutation", "matcher", "checker", "cls_tp", "tp", "fp", "fn", "match_time", "check_time",
+        "widgets", "ocr", "ocr_saved"
+    ])
     
     # Iterate through all screens in public app dataset
     for mutation_name, mutate in mutations.items():
@@ -103,10 +109,12 @@ if __name__ == "__main__":
 
             try:
                 screen1: Screen = load_screen(image_path)
-                screen1.ocr()
-                screen2 = deepcopy(screen1)
+                ocr_stats1 = screen1.ocr(types=ocr_types)
+                screen2 = screen1.clone()
                 screen2, y_true = mutate(screen2, 0.05)
-                screen2.ocr()
+                ocr_stats2 = screen2.ocr(incremental=True, reference=screen1, types=ocr_types)
+                widgets = ocr_stats1["widgets"] + ocr_stats2["widgets"]
+                ocred = ocr_stats1["ocred"] + ocr_stats2["ocred"]
             except Exception as e:
                 import traceback
                 print(traceback.format_exc())
@@ -172,5 +180,6 @@ if __name__ == "__main__":
                     writer.writerow([
                         image_path, mutation_name, matcher_name, checker_name,
                         cls_tp, tp, fp, fn,
-                        match_time, check_time
+                        match_time, check_time,
+                        widgets, ocred, widgets - ocred
                     ])
\ No newline at end of file
@@ -1,4 +1,3 @@
-from copy import deepcopy
 
 import numpy as np
 
@@ -9,7 +8,7 @@ from .utils import sample_p, get_context_color
 def delete_widgets(screen: Screen, p: float) -> tuple[Screen, set]:
     """Mask a widget by its context color
     """
-    screen = deepcopy(screen)
+    screen = screen.clone()
     widgets: dict[int, Widget] = sample_p(screen.widgets, p)
     remove = set()
     for id, widget in widgets.items():
@@ -17,7 +16,7 @@ def delete_widgets(screen: Screen, p: float) -> tuple[Screen, set]:
         xmin, ymin, xmax, ymax = widget.bbox
         widget_image = screen.image[ymin:ymax, xmin:xmax]
         color = get_context_color(widget_image)
-        screen.image[ymin:ymax, xmin:xmax] = color
+        screen.edit_image(widget.bbox)[:] = color
 
     screen.widgets = {id: widget for id, widget in screen.widgets.items() if id not in remove}
     changed = set([(id, None) for id in remove])
@@ -37,7 +36,7 @@ def delete_row(screen: Screen, p: float) -> tuple[Screen, set]:
                    │ c │
                    └───┘
     """
-    screen = deepcopy(screen)
+    screen = screen.clone()
     widgets: dict[int, Widget] = sample_p(screen.widgets, p)
     remove = set()
     shifted = set()
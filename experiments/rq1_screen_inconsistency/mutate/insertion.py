@@ -1,7 +1,6 @@
 import os
 import glob
 import random
-from copy import deepcopy
 
 import numpy as np
 from dotenv import load_dotenv
@@ -54,7 +53,7 @@ def insert_widgets(screen: Screen, p: float) -> tuple[Screen, set]:
         
         return max_area, max_bbox
     
-    screen = deepcopy(screen)
+    screen = screen.clone()
     height, width, _ = screen.image.shape
 
     # Select a random screen
@@ -85,7 +84,7 @@ def insert_widgets(screen: Screen, p: float) -> tuple[Screen, set]:
         image = random_screen.image[ymin1:ymax1, xmin1:xmax1].copy()
 
         xmax3, ymax3 = min(xmin2 + image.shape[1], width), min(ymin2 + image.shape[0], height)
-        screen.image[ymin2:ymax3, xmin2:xmax3] = image[0:ymax3-ymin2, 0:xmax3-xmin2]
+        screen.edit_image(Bbox(xmin2, ymin2, xmax3, ymax3))[:] = image[0:ymax3-ymin2, 0:xmax3-xmin2]
         unoccupied_mask[ymin2:ymin2+image.shape[0], xmin2:xmin2+image.shape[1]] = 0
 
         new_widget_id = max(screen.widgets.keys()) + 1
@@ -125,7 +124,7 @@ def insert_row(screen: Screen, p: float) -> tuple[Screen, set]:
                    │ c │
                    └───┘
     """
-    screen = deepcopy(screen)
+    screen = screen.clone()
 
     # Select a random screen
     random_path = random.choice(IMAGE_PATHS)
@@ -1,6 +1,5 @@
 import string
 import random
-from copy import deepcopy
 from collections import Counter
 
 import cv2
@@ -49,8 +48,8 @@ def swap_widgets(screen: Screen, p: float) -> tuple[Screen, set]:
         image_j = screen.image[ymin_j:ymax_j, xmin_j:xmax_j].copy()
 
         # Fill in previous patch locations with whitespace
-        screen.image[ymin_i:ymax_i, xmin_i:xmax_i] = (255, 255, 255)
-        screen.image[ymin_j:ymax_j, xmin_j:xmax_j] = (255, 255, 255)
+        screen.edit_image(i.bbox)[:] = (255, 255, 255)
+        screen.edit_image(j.bbox)[:] = (255, 255, 255)
 
         # Determine the destination bounds for each patch
         h, w, _ = screen.image.shape
@@ -63,10 +62,10 @@ def swap_widgets(screen: Screen, p: float) -> tuple[Screen, set]:
         j.bbox = bbox_a
 
         # Perform the swap with adjusted dimensions
-        screen.image[bbox_a[1]:bbox_a[3], bbox_a[0]:bbox_a[2]] = image_j[:j.height, :j.width]
-        screen.image[bbox_b[1]:bbox_b[3], bbox_b[0]:bbox_b[2]] = image_i[:i.height, :i.width]
+        screen.edit_image(bbox_a)[:] = image_j[:j.height, :j.width]
+        screen.edit_image(bbox_b)[:] = image_i[:i.height, :i.width]
 
-    screen = deepcopy(screen)
+    screen = screen.clone()
     n = len(screen.widgets)
     scores = [[0] * n for _ in range(n)]
 
@@ -138,7 +137,7 @@ def change_widgets_text(screen: Screen, p: float) -> tuple[Screen, set]:
 
         return font_scale - 0.1
 
-    screen = deepcopy(screen)
+    screen = screen.clone()
     text_based_widgets = {WidgetType.TEXT_VIEW, WidgetType.TEXT_BUTTON}
     widgets = {id: widget for id, widget in screen.widgets.items() if widget.type in text_based_widgets}
     widgets: dict[int, Widget] = sample_p(widgets, p)
@@ -166,8 +165,9 @@ def change_widgets_text(screen: Screen, p: float) -> tuple[Screen, set]:
             brightness = 0.299 * bg_color[0] + 0.587 * bg_color[1] + 0.114 * bg_color[2]
             text_color = (0, 0, 0) if brightness > 128 else (255, 255, 255)
 
-            screen.image[ymin:ymax, xmin:xmax] = bg_color
-            screen.image = cv2.putText(screen.image, text, (xmin, ymax), font, font_scale, text_color, thickness)
+            screen.edit_image(Bbox(xmin, ymin, xmax, ymax))[:] = bg_color
+            widget_image = screen.edit_image(widget.bbox)
+            cv2.putText(widget_image, text, (xmin - rel_xmin, ymax - rel_ymin), font, font_scale, text_color, thickness)
 
         changed.add((id, id, Inconsistency.TEXT))
 
@@ -199,7 +199,7 @@ def change_widgets_color(screen: Screen, p: float) -> tuple[Screen, set]:
         result_image = cv2.add(result_image, masked_whitespace)
         return result_image
 
-    screen = deepcopy(screen)
+    screen = screen.clone()
     image_based_widgets = {WidgetType.ICON_BUTTON, WidgetType.COMBINED_BUTTON, WidgetType.IMAGE_VIEW, WidgetType.CHART}
     widgets = {id: widget for id, widget in screen.widgets.items() if widget.type in image_based_widgets}
     widgets = sample_p(widgets, p)
@@ -209,7 +209,7 @@ def change_widgets_color(screen: Screen, p: float) -> tuple[Screen, set]:
         xmin, ymin, xmax, ymax = widget.bbox
         widget_image = screen.image[ymin:ymax, xmin:xmax]
         widget_image = transform(widget_image)
-        screen.image[ymin:ymax, xmin:xmax] = widget_image
+        screen.edit_image(widget.bbox)[:] = widget_image
         changed.add((id, id, Inconsistency.COLOR))
 
     return screen, changed
\ No newline at end of file
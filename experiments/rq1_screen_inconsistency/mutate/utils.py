@@ -1,4 +1,5 @@
 import random
+from collections.abc import Mapping
 
 import numpy as np
 
@@ -15,7 +16,7 @@ def sample_p(population: dict | list, p: float) -> dict | list:
     k = max(int(p * len(population)), 1)
     if len(population) < k: 
         return population
-    if isinstance(population, dict):
+    if isinstance(population, Mapping):
         keys = random.sample(list(population), k)
         values = [population[k] for k in keys]
         return dict(zip(keys, values))
@@ -0,0 +1,75 @@
+import os
+import csv
+import glob
+import argparse
+import warnings
+from difflib import SequenceMatcher
+from timeit import default_timer as timer
+
+from dotenv import load_dotenv
+
+from guipilot.entities import Screen, Widget
+from utils import load_screen
+
+
+def same_texts(w1: Widget, w2: Widget) -> bool:
+    """Whether two widgets have the same texts, by the rule of the text consistency checkers
+    """
+    if len(w1.texts) != len(w2.texts): return False
+    for t1, t2 in zip(w1.texts, w2.texts):
+        if SequenceMatcher(None, t1.lower(), t2.lower()).quick_ratio() < 0.95: return False
+    return True
+
+
+if __name__ == "__main__":
+    # compare latency and text agreement of "fullscreen" OCR against "widget" OCR on the rq1 dataset
+    parser = argparse.ArgumentParser(prog="OCR mode comparison")
+    parser.add_argument("--limit", type=int, default=None, help="number of screens to evaluate")
+    parser.add_argument("--min_overlap", type=float, default=0.5)
+    args = parser.parse_args()
+
+    load_dotenv()
+    warnings.filterwarnings("ignore")
+
+    dataset_path = os.getenv("DATASET_PATH")
+    all_paths: list[str] = []
+    for app_path in glob.glob(os.path.join(dataset_path, "**", "*")):
+        image_paths = glob.glob(f"{app_path}/*.jpg")
+        image_paths = [x for x in image_paths if x.split("/")[-1].replace(".jpg", "").isdigit()]
+        image_paths.sort(key=lambda path: int(path.split("/")[-1].replace(".jpg", "")))
+        all_paths += image_paths
+    all_paths = all_paths[:args.limit]
+
+    writer = csv.writer(open(f"./ocr_modes.csv", "w"))
+    writer.writerow(["id", "widgets", "widget_time", "fullscreen_time", "same", "text_widgets", "recall"])
+
+    total_widget_time, total_fullscreen_time, total_same, total_widgets = 0, 0, 0, 0
+    for image_path in all_paths:
+        try:
+            screen: Screen = load_screen(image_path)
+        except Exception as e:
+            print(f"error loading {image_path}, skipped: {e}")
+            continue
+
+        s1, s2 = screen.clone(), screen.clone()
+        start_time = timer()
+        s1.ocr(mode="widget")
+        widget_time = timer() - start_time
+        start_time = timer()
+        s2.ocr(mode="fullscreen", min_overlap=args.min_overlap)
+        fullscreen_time = timer() - start_time
+
+        # agreement over all widgets, and recall of widgets that have text in "widget" mode
+        same = [same_texts(s1.widgets[id], s2.widgets[id]) for id in s1.widgets]
+        with_text = [id for id in s1.widgets if s1.widgets[id].texts]
+        recall = sum(same_texts(s1.widgets[id], s2.widgets[id]) for id in with_text) / max(len(with_text), 1)
+        writer.writerow([image_path, len(same), widget_time, fullscreen_time, sum(same), len(with_text), recall])
+
+        total_widget_time += widget_time
+        total_fullscreen_time += fullscreen_time
+        total_same += sum(same)
+        total_widgets += len(same)
+
+    print(f"screens: {len(all_paths)}, widgets: {total_widgets}")
+    print(f"widget mode: {total_widget_time:.1f} s, fullscreen mode: {total_fullscreen_time:.1f} s")
+    print(f"widgets with the same texts: {total_same / max(total_widgets, 1):.1%}")
@@ -1,3 +1,3 @@
-from .checker import ScreenChecker
+from .checker import ScreenChecker, required_text_types, TEXT_TYPES
 from .guipilot import GUIPilot
 from .gvt import GVT
\ No newline at end of file
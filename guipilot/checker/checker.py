@@ -1,15 +1,37 @@
 from __future__ import annotations
 import typing
 from abc import ABC, abstractmethod
+from collections.abc import Iterable
 from timeit import default_timer as timer
 
 import numpy as np
 
+from guipilot.entities import WidgetType
+
 if typing.TYPE_CHECKING:
     from guipilot.entities import Widget, Screen
 
 
+# widget types whose text the GUIPilot and GVT checkers compare
+TEXT_TYPES = frozenset([WidgetType.TEXT_VIEW, WidgetType.TEXT_BUTTON, WidgetType.COMBINED_BUTTON, WidgetType.INPUT_BOX])
+
+
+def required_text_types(checkers: Iterable[ScreenChecker]) -> frozenset[WidgetType] | None:
+    """Widget types the checkers read text from, None if any checker may read text from all types
+
+    Pass to `Screen.ocr(types=...)` to skip OCR of widgets whose text is never checked.
+    """
+    types = set()
+    for checker in checkers:
+        if checker.text_types is None: return None
+        types |= checker.text_types
+    return frozenset(types)
+
+
 class ScreenChecker(ABC):
+    # widget types whose text `check_widget_pair` reads, None for all types
+    text_types: frozenset[WidgetType] | None = None
+
     def check(self, screen_i: Screen, screen_j: Screen, pairs: list[tuple[int, int]]) -> tuple[set, float]:
         """Checks for widget inconsistencies on two screens.
 
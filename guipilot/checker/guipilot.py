@@ -5,7 +5,7 @@ import cv2
 import numpy as np
 from difflib import SequenceMatcher
 
-from .checker import ScreenChecker
+from .checker import ScreenChecker, TEXT_TYPES
 from guipilot.entities import WidgetType, Inconsistency
 
 if typing.TYPE_CHECKING:
@@ -13,6 +13,8 @@ if typing.TYPE_CHECKING:
 
 
 class GUIPilot(ScreenChecker):
+    text_types = TEXT_TYPES
+
     def check_widget_pair(self, w1: Widget, w2: Widget, wi1: np.ndarray, wi2: np.ndarray) -> list[tuple]:
         def check_bbox_consistency(w1: Widget, w2: Widget) -> bool:
             """Check if both widgets have similar position, size, and shape on the screen
@@ -28,8 +30,7 @@ class GUIPilot(ScreenChecker):
         def check_text_consistency(w1: Widget, w2: Widget) -> bool:
             """Check if the text on both widgets are similar
             """
-            has_text = {WidgetType.TEXT_VIEW, WidgetType.TEXT_BUTTON, WidgetType.COMBINED_BUTTON, WidgetType.INPUT_BOX}
-            if w1.type not in has_text or w2.type not in has_text: return True
+            if w1.type not in self.text_types or w2.type not in self.text_types: return True
 
             for t1, t2 in zip(w1.texts, w2.texts):
                 t1 = re.sub(r'[^a-zA-Z0-9]', '', t1)
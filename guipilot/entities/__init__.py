@@ -1,4 +1,5 @@
 from .process import Process
 from .screen import Screen
 from .widget import Widget, WidgetType
+from .table import WidgetTable
 from .constants import Inconsistency, Bbox
\ No newline at end of file
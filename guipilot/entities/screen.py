@@ -1,13 +1,16 @@
 from __future__ import annotations
 import typing
-from dataclasses import dataclass, field
+import weakref
+import warnings
+from collections.abc import Iterable
 
 import cv2
 import numpy as np
 
 from .constants import Bbox
 from .widget import Widget, WidgetType
-from guipilot.models import OCR, Detector
+from .table import WidgetTable, WidgetView, TYPE_CODES, to_pixels
+from guipilot.models import registry
 
 if typing.TYPE_CHECKING:
     from .screen import Screen
@@ -15,51 +18,305 @@ if typing.TYPE_CHECKING:
     from guipilot.matcher import WidgetMatcher
 
 
-ocr = OCR(service_url="http://localhost:5000/detect")
-detector = Detector(service_url="http://localhost:6000/detect")
+class Screen:
+    def __init__(self, image: np.ndarray, widgets: dict[int, Widget] | None = None) -> None:
+        """
+        Params
+            image: screenshot of the screen
+            widgets: dictionary of widget ID -> widget on the screen
+        """
+        self.image = image
+        self.widgets = widgets if widgets is not None else {}
 
+    @property
+    def image(self) -> np.ndarray:
+        """Screenshot of the screen, read-only on a clone until written, see `edit_image()`
+        """
+        return self._image
 
-@dataclass
-class Screen:
-    image: np.ndarray
-    widgets: dict[int, Widget] = field(default_factory=dict)
+    @image.setter
+    def image(self, image: np.ndarray) -> None:
+        self._image = image
+        self._owners = [1]  # screens sharing the buffer, shared by a screen and its clones
+        self._version = getattr(self, "_version", 0) + 1
+        self._dirty = None  # unknown which pixels changed
+
+    def edit_image(self, bbox: Bbox | None = None) -> np.ndarray:
+        """Writable screenshot, copied first if the buffer is shared with a clone or read-only
+
+        Args:
+            bbox: region to write, returns a view of this region only. Regions written are 
+                tracked, so that `ocr(incremental=True)` only re-runs OCR on widgets they touch. 
+                Without a bbox the whole screenshot is marked as written.
+        """
+        if self._owners[0] > 1 or not self._image.flags.writeable:
+            self._owners[0] -= 1
+            self._image = self._image.copy()
+            self._owners = [1]
+
+        height, width = self._image.shape[:2]
+        xmin, ymin, xmax, ymax = (0, 0, width, height) if bbox is None else map(int, bbox)
+        xmin, ymin = min(max(xmin, 0), width), min(max(ymin, 0), height)
+        xmax, ymax = min(max(xmax, xmin), width), min(max(ymax, ymin), height)
+        self._version += 1
+        if self._dirty is not None: self._dirty.append((xmin, ymin, xmax, ymax))
+        return self._image if bbox is None else self._image[ymin:ymax, xmin:xmax]
+
+    def clone(self) -> Screen:
+        """Copy-on-write copy of the screen
+
+        The image buffer and widget table are shared with this screen. The image is copied
+        on the first `edit_image()` of either screen, the table arrays on the first widget 
+        write. Widget texts are copied right away, see `WidgetTable.clone()`.
+
+        This screen's image stays writable, the clone gets a read-only view of it. Only
+        writes through `edit_image()` are copy-on-write: writing to `image` of this screen
+        directly, or to another array aliasing its buffer, also changes the clone.
+        """
+        image = self._image.view()
+        image.flags.writeable = False
+        self._owners[0] += 1
+
+        screen = Screen.__new__(Screen)
+        screen._image, screen._owners, screen._version = image, self._owners, 0
+        screen._widgets = WidgetView(self.table.clone())
+
+        # regions written since the clone are relative to the earliest unchanged ancestor
+        base = self._get_base()
+        if base is not None and self._dirty is not None:
+            screen._base, screen._dirty = self._base, list(self._dirty)
+        else:
+            screen._base, screen._dirty = (weakref.ref(self), self._version), []
+        return screen
+
+    def _get_base(self) -> Screen | None:
+        """The screen that regions written are tracked against, None if it changed or is gone
+        """
+        if getattr(self, "_base", None) is None: return None
+        ref, version = self._base
+        base = ref()
+        return base if base is not None and base._version == version else None
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state["_base"] = None  # weak references cannot be pickled
+        return state
+
+    @property
+    def widgets(self) -> WidgetView:
+        """Dictionary of widget ID -> widget, a view of `table`
+        """
+        return self._widgets
+
+    @widgets.setter
+    def widgets(self, widgets: dict[int, Widget]) -> None:
+        self._widgets = WidgetView.from_widgets(widgets)
+
+    @property
+    def table(self) -> WidgetTable:
+        """Columnar storage of the widgets on the screen
+        """
+        return self._widgets.table
+
+    @table.setter
+    def table(self, table: WidgetTable) -> None:
+        self._widgets = WidgetView(table)
+
+    def __repr__(self) -> str:
+        return f"Screen(image={self.image.shape}, widgets={len(self.widgets)})"
     
     def detect(self) -> None:
         """
         Use object detector to extract widgets from screen
         Updates widgets list to the detection results
+        The detector is created on first use, see `guipilot.models.registry`
         """
-        def _to_bbox(points: np.ndarray) -> Bbox:
-            xmin, ymin, xmax, ymax = points
-            return Bbox(int(xmin), int(ymin), int(xmax), int(ymax))
-        
-        bboxes, widget_types = detector(self.image)
-        self.widgets = {
-            i: Widget(
-                type=WidgetType(widget_type),
-                bbox=_to_bbox(bbox)
-            )
-            for i, (bbox, widget_type) in enumerate(zip(bboxes, widget_types))
-        }
+        detector = registry.get("detector")
+        self._set_detections(*detector(self.image))
+
+    async def adetect(self) -> None:
+        """`detect()` awaitable from asyncio code, the detector runs in a worker thread, see `Detector.acall()`
+        """
+        import asyncio
+
+        detector = await asyncio.to_thread(registry.get, "detector")
+        self._set_detections(*await detector.acall(self.image))
+
+    @staticmethod
+    def detect_many(screens: list[Screen], batch_size: int = 16) -> None:
+        """`detect()` on several screens, in batches, see `Detector.detect_many()`
+        """
+        detector = registry.get("detector")
+        detections = detector.detect_many([screen.image for screen in screens], batch_size)
+        for screen, (bboxes, widget_types) in zip(screens, detections):
+            screen._set_detections(bboxes, widget_types)
+
+    def _set_detections(self, bboxes: np.ndarray, widget_types: list[str]) -> None:
+        self.table = WidgetTable(
+            ids=np.arange(len(bboxes)),
+            bboxes=np.asarray(bboxes).reshape(-1, 4).astype(np.int32),
+            types=[TYPE_CODES[WidgetType(widget_type)] for widget_type in widget_types]
+        )
 
         assert len(self.widgets) == len(bboxes) == len(widget_types)
 
-    def ocr(self) -> None:
+    def ocr(
+        self, 
+        batch_size: int = 32, 
+        mode: str = "widget", 
+        min_overlap: float = 0.5, 
+        incremental: bool = False, 
+        reference: Screen | None = None,
+        types: Iterable[WidgetType] | None = None,
+        workers: int | None = None
+    ) -> dict[str, int]:
         """
         Use OCR to extract text from screen and assign to widgets
+        The OCR model is created on first use, see `guipilot.models.registry`
+
+        Args:
+            batch_size: number of widget crops per OCR request, for "widget" mode
+            mode: "widget" runs OCR on each widget crop, "fullscreen" runs OCR once on the 
+                whole screen and assigns each text to the widgets that contain it
+            min_overlap: fraction of a text bbox that must lie inside a widget to be assigned 
+                to it, for "fullscreen" mode
+            incremental: only run OCR on widgets whose bbox or pixels differ from the same widget
+                on `reference`, copy the texts of the others, for "widget" mode
+            reference: an OCRed screen to compare against, defaults to the screen this one 
+                was cloned from
+            types: only run OCR on widgets of these types, e.g. the types checkers read text 
+                from, see `guipilot.checker.required_text_types()`, all types if None
+            workers: number of OCR batches run concurrently, for "widget" mode, defaults to 
+                the OCR model's `workers`
+
+        Returns:
+            counts of `widgets`, widgets `ocred`, and widgets not OCRed because their type is 
+            `skipped_types` or their texts are `reused` from the reference screen
+        """
+        ocr = registry.get("ocr")
+        image, rows, counts = self._plan_ocr(mode, incremental, reference, types)
+        if mode == "fullscreen":
+            texts, text_bboxes = ocr(image)
+            results = _assign_texts(to_pixels(self.table.bboxes[rows]), texts, text_bboxes, min_overlap)
+        else:
+            results = ocr.batch(self._crops(image, rows), batch_size, workers)
+
+        self._set_texts(rows, results)
+        return counts
+
+    async def aocr(
+        self, 
+        batch_size: int = 32, 
+        mode: str = "widget", 
+        min_overlap: float = 0.5, 
+        incremental: bool = False, 
+        reference: Screen | None = None,
+        types: Iterable[WidgetType] | None = None
+    ) -> dict[str, int]:
+        """`ocr()` awaitable from asyncio code, micro-batches of widget crops run in worker threads, see `OCR.abatch()`
+
+        Screens awaited together share the OCR model's concurrency limit, e.g.
+        `await asyncio.gather(*[screen.aocr() for screen in screens])`.
+        """
+        import asyncio
+
+        ocr = await asyncio.to_thread(registry.get, "ocr")
+        image, rows, counts = self._plan_ocr(mode, incremental, reference, types)
+        if mode == "fullscreen":
+            texts, text_bboxes = await ocr.acall(image)
+            results = _assign_texts(to_pixels(self.table.bboxes[rows]), texts, text_bboxes, min_overlap)
+        else:
+            results = await ocr.abatch(self._crops(image, rows), batch_size)
+
+        self._set_texts(rows, results)
+        return counts
+
+    def _plan_ocr(
+        self, 
+        mode: str, 
+        incremental: bool, 
+        reference: Screen | None, 
+        types: Iterable[WidgetType] | None
+    ) -> tuple[np.ndarray, list[int], dict[str, int]]:
+        """Copy the texts of widgets unchanged from the reference screen, see `ocr()`
+
+        Returns:
+            the RGB image, rows of the widgets to OCR, and the counts returned by `ocr()`
+        """
+        assert mode in ("widget", "fullscreen"), f"unknown OCR mode: {mode}"
+        assert not incremental or mode == "widget", "incremental OCR needs widget mode"
+        image = cv2.cvtColor(self.image, cv2.COLOR_BGR2RGB)
+        ids = self.table.ids.tolist()
+
+        if incremental and reference is None:
+            reference = self._get_base()
+            if reference is None and getattr(self, "_base", None) is not None:
+                # written since the clone, widget pixels are compared instead, see `_unchanged()`
+                reference = self._base[0]()
+        if incremental and reference is not None:
+            unchanged = self._unchanged(reference)
+            for row in np.flatnonzero(unchanged).tolist():
+                widget, source = self.widgets[ids[row]], reference.widgets[ids[row]]
+                widget.texts = list(source.texts)
+                widget.text_bboxes = [list(text_bbox) for text_bbox in source.text_bboxes]
+            changed = ~unchanged
+        else:
+            changed = np.ones(len(ids), dtype=bool)
+
+        needed = np.ones(len(ids), dtype=bool)
+        if types is not None:
+            needed = np.isin(self.table.types, [TYPE_CODES[widget_type] for widget_type in types])
+        rows = np.flatnonzero(changed & needed).tolist()
+
+        counts = {
+            "widgets": len(ids),
+            "ocred": len(rows),
+            "skipped_types": int((changed & ~needed).sum()),
+            "reused": int((~changed).sum())
+        }
+        return image, rows, counts
+
+    def _crops(self, image: np.ndarray, rows: list[int]) -> list[np.ndarray]:
+        bboxes = to_pixels(self.table.bboxes[rows]).tolist()
+        return [image[ymin:ymax, xmin:xmax] for xmin, ymin, xmax, ymax in bboxes]
+
+    def _set_texts(self, rows: list[int], results: list[tuple[list, list] | Exception]) -> None:
+        ids = self.table.ids.tolist()
+        for row, result in zip(rows, results):
+            widget = self.widgets[ids[row]]
+            if isinstance(result, Exception):
+                warnings.warn(f"OCR failed on widget {ids[row]} {widget.bbox} of screen {self.image.shape}: {result!r}")
+                continue
+            widget.texts, widget.text_bboxes = result
+
+    def _unchanged(self, reference: Screen) -> np.ndarray:
+        """`(n,)` whether each widget has the same ID, bbox and pixels on the reference screen
+
+        Pixels are compared through the regions written since cloning from the reference if
+        they are known, see `edit_image()`, and directly otherwise.
         """
-        image = np.array(self.image)
-        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        widgets = self.widgets.values()
-        for widget in widgets:
-            xmin, ymin, xmax, ymax = widget.bbox
-            widget_image = image[ymin:ymax, xmin:xmax].copy()
-            try:
-                widget.texts, widget.text_bboxes = ocr(widget_image)
-            except Exception as e:
-                print(e)
-                print(self.image.shape)
-                print(widget.bbox)
+        bboxes = self.table.bboxes
+        reference_rows = reference.widgets._rows
+        rows = np.array([reference_rows.get(id, -1) for id in self.table.ids.tolist()], dtype=np.int64)
+        unchanged = rows >= 0
+        if len(reference.table) == 0 or self.image.shape != reference.image.shape: 
+            return np.zeros(len(bboxes), dtype=bool)
+        unchanged &= (reference.table.bboxes[np.clip(rows, 0, None)] == bboxes).all(axis=1)
+
+        if self._get_base() is reference and self._dirty is not None:
+            dirty = np.asarray(self._dirty, dtype=np.int64).reshape(1, -1, 4)
+            widgets = to_pixels(bboxes).reshape(-1, 1, 4)
+            touched = (
+                (widgets[..., 0] < dirty[..., 2]) & (dirty[..., 0] < widgets[..., 2]) &
+                (widgets[..., 1] < dirty[..., 3]) & (dirty[..., 1] < widgets[..., 3])
+            )
+            return unchanged & ~touched.any(axis=1)
+
+        for row in np.flatnonzero(unchanged).tolist():
+            xmin, ymin, xmax, ymax = to_pixels(bboxes[row]).tolist()
+            same = np.array_equal(self.image[ymin:ymax, xmin:xmax], reference.image[ymin:ymax, xmin:xmax])
+            unchanged[row] = same
+        return unchanged
 
     def check(self, target: Screen, matcher: WidgetMatcher, checker: ScreenChecker) -> tuple[set, float]:
         """Check for screen inconsistency
@@ -74,4 +331,47 @@ class Screen:
         """
         pairs = matcher.match(self, target)
         inconsistencies, time_taken = checker.check(self, target, pairs)
-        return inconsistencies, time_taken
\ No newline at end of file
+        return inconsistencies, time_taken
+
+
+def _assign_texts(
+    bboxes: np.ndarray, 
+    texts: list[str], 
+    text_bboxes: list, 
+    min_overlap: float
+) -> list[tuple[list[str], list[list[float]]]]:
+    """Assign texts found on the whole screen to the widgets that contain them
+
+    A text is assigned to every widget covering at least `min_overlap` of its bbox, so that 
+    nested widgets all get the text, as when each widget is OCRed separately. 
+
+    Args:
+        bboxes: `(n, 4)` widget bboxes
+        texts, text_bboxes: OCR results of the screen, in screen coordinates
+        min_overlap: fraction of a text bbox that must lie inside a widget
+
+    Returns:
+        `(texts, text_bboxes)` of each widget, with text bboxes relative to the widget and 
+        clipped to it, in OCR order
+    """
+    widgets = np.asarray(bboxes, dtype=np.float64).reshape(-1, 1, 4)
+    boxes = np.asarray(text_bboxes, dtype=np.float64).reshape(1, -1, 4)
+
+    # (n, k) fraction of each text bbox inside each widget
+    width = np.minimum(widgets[..., 2], boxes[..., 2]) - np.maximum(widgets[..., 0], boxes[..., 0])
+    height = np.minimum(widgets[..., 3], boxes[..., 3]) - np.maximum(widgets[..., 1], boxes[..., 1])
+    intersection = np.clip(width, 0, None) * np.clip(height, 0, None)
+    area = (boxes[..., 2] - boxes[..., 0]) * (boxes[..., 3] - boxes[..., 1])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        overlap = np.where(area > 0, intersection / area, 0)
+
+    # text bboxes relative to each widget, clipped to the widget
+    xmin, ymin, xmax, ymax = np.moveaxis(widgets, -1, 0)
+    size = np.stack([xmax - xmin, ymax - ymin, xmax - xmin, ymax - ymin], axis=-1)
+    relative = np.clip(boxes - np.stack([xmin, ymin, xmin, ymin], axis=-1), 0, size)
+
+    results = []
+    for i, row in enumerate(overlap >= min_overlap):
+        columns = np.flatnonzero(row)
+        results.append(([texts[j] for j in columns], relative[i, columns].tolist()))
+    return results
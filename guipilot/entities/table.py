@@ -0,0 +1,211 @@
+from __future__ import annotations
+from collections.abc import MutableMapping, Iterator
+
+import numpy as np
+
+from .constants import Bbox
+from .widget import Widget, WidgetType, FIELDS
+
+
+WIDGET_TYPES: list[WidgetType] = list(WidgetType)
+TYPE_CODES: dict[WidgetType, int] = {widget_type: code for code, widget_type in enumerate(WIDGET_TYPES)}
+
+
+def to_bbox(values: list[float]) -> Bbox:
+    """Bbox of a table row, integral coordinates are returned as ints
+    """
+    return Bbox(*(int(value) if value.is_integer() else value for value in values))
+
+
+def to_pixels(bboxes: np.ndarray) -> np.ndarray:
+    """Integer pixel bboxes for slicing images, coordinates are truncated as by `int()`
+    """
+    return bboxes.astype(np.int64)
+
+
+class WidgetTable:
+    """Struct-of-arrays storage of the widgets on a screen
+
+    Attributes:
+        ids: `(n,)` int64 widget IDs
+        bboxes: `(n, 4)` float64 `xmin, ymin, xmax, ymax`, as given, see `to_pixels()` to slice images
+        types: `(n,)` uint8 widget type codes, indices into `WIDGET_TYPES`
+        texts: ragged list of texts per widget
+        text_bboxes: ragged list of text bboxes per widget, relative to the widget
+
+    Tables created by `clone()` share the array columns with their source until either one is 
+    written. The ragged columns are copied by `clone()`, as widgets change their lists in place.
+    """
+    def __init__(
+        self, 
+        ids: np.ndarray, 
+        bboxes: np.ndarray, 
+        types: np.ndarray, 
+        texts: list[list[str]] | None = None, 
+        text_bboxes: list[list[Bbox]] | None = None
+    ) -> None:
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.bboxes = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+        self.types = np.asarray(types, dtype=np.uint8)
+        self.texts = texts if texts is not None else [[] for _ in range(len(self.ids))]
+        self.text_bboxes = text_bboxes if text_bboxes is not None else [[] for _ in range(len(self.ids))]
+        assert len(self.ids) == len(self.bboxes) == len(self.types) == len(self.texts) == len(self.text_bboxes)
+        self._shared = False
+
+    @classmethod
+    def from_widgets(cls, widgets: dict[int, Widget]) -> WidgetTable:
+        """Build a table from a dictionary of widget ID -> widget
+        """
+        return cls(
+            ids=list(widgets.keys()),
+            bboxes=[widget.bbox for widget in widgets.values()],
+            types=[TYPE_CODES[widget.type] for widget in widgets.values()],
+            texts=[widget.texts for widget in widgets.values()],
+            text_bboxes=[widget.text_bboxes for widget in widgets.values()]
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def clone(self) -> WidgetTable:
+        """Copy-on-write copy, array storage is shared until either table is written
+        """
+        table = WidgetTable.__new__(WidgetTable)
+        table.__dict__.update(self.__dict__)
+        table.texts = [list(texts) for texts in self.texts]
+        table.text_bboxes = [list(text_bboxes) for text_bboxes in self.text_bboxes]
+        table._shared = self._shared = True
+        return table
+
+    def _own(self) -> None:
+        """Copy shared array storage before it is written
+        """
+        if not self._shared: return
+        self.ids, self.bboxes, self.types = self.ids.copy(), self.bboxes.copy(), self.types.copy()
+        self._shared = False
+
+    def append(self, id: int, widget: Widget) -> int:
+        """Add a widget as the last row, returns its row index
+        """
+        self._own()
+        self.ids = np.append(self.ids, np.int64(id))
+        self.bboxes = np.vstack([self.bboxes, np.asarray(widget.bbox, dtype=np.float64)])
+        self.types = np.append(self.types, np.uint8(TYPE_CODES[widget.type]))
+        self.texts.append(widget.texts)
+        self.text_bboxes.append(widget.text_bboxes)
+        return len(self.ids) - 1
+
+    def delete(self, row: int) -> None:
+        """Remove a row, rows below it move up by one
+        """
+        self._own()
+        self.ids = np.delete(self.ids, row)
+        self.bboxes = np.delete(self.bboxes, row, axis=0)
+        self.types = np.delete(self.types, row)
+        del self.texts[row]
+        del self.text_bboxes[row]
+
+    def get(self, row: int) -> Widget:
+        """Create a widget from a row
+        """
+        return Widget(
+            type=WIDGET_TYPES[self.types[row]],
+            bbox=to_bbox(self.bboxes[row].tolist()),
+            texts=self.texts[row],
+            text_bboxes=self.text_bboxes[row]
+        )
+
+    def set(self, row: int, name: str, value):
+        """Write a widget attribute to a row
+        """
+        self._own()
+        if name == "bbox": self.bboxes[row] = value
+        elif name == "type": self.types[row] = TYPE_CODES[value]
+        elif name == "texts": self.texts[row] = value
+        elif name == "text_bboxes": self.text_bboxes[row] = value
+
+
+class WidgetView(MutableMapping):
+    """Dictionary of widget ID -> widget, backed by a `WidgetTable`
+
+    Widgets are created from the table on first access and cached. Widgets in the view 
+    are bound to their row, so that assigning to their attributes updates the table. 
+    Widgets deleted or replaced in the view are unbound and keep their last values.
+    A widget bound to another table or row, e.g. taken from another screen, is stored as 
+    a copy, so that it keeps writing to the screen it came from.
+    """
+    def __init__(self, table: WidgetTable) -> None:
+        self.table = table
+        self._rows: dict[int, int] = {id: row for row, id in enumerate(table.ids.tolist())}
+        self._widgets: dict[int, Widget] = {}
+
+    @classmethod
+    def from_widgets(cls, widgets: dict[int, Widget]) -> WidgetView:
+        """Build a view that keeps the given widget instances, or copies of widgets bound elsewhere
+        """
+        widgets = {id: _detach(widget) for id, widget in widgets.items()}
+        view = cls(WidgetTable.from_widgets(widgets))
+        for id, widget in widgets.items():
+            view._bind(id, widget)
+        return view
+
+    def _bind(self, id: int, widget: Widget) -> None:
+        widget._bind(self.table, self._rows[id])
+        self._widgets[id] = widget
+
+    def __getitem__(self, id: int) -> Widget:
+        widget = self._widgets.get(id)
+        if widget is None:
+            widget = self.table.get(self._rows[id])
+            self._bind(id, widget)
+        return widget
+
+    def __setitem__(self, id: int, widget: Widget) -> None:
+        if widget._table is not self.table or widget._row != self._rows.get(id): widget = _detach(widget)
+        if id in self._rows:
+            replaced = self._widgets.get(id)
+            if replaced is not None and replaced is not widget: replaced._unbind()
+            row = self._rows[id]
+            for name in FIELDS:
+                self.table.set(row, name, getattr(widget, name))
+        else:
+            self._rows[id] = self.table.append(id, widget)
+        self._bind(id, widget)
+
+    def __delitem__(self, id: int) -> None:
+        row = self._rows.pop(id)
+        self.table.delete(row)
+        deleted = self._widgets.pop(id, None)
+        if deleted is not None: deleted._unbind()
+        self._rows = {id: row for row, id in enumerate(self.table.ids.tolist())}
+        for id, widget in self._widgets.items():
+            widget._bind(self.table, self._rows[id])
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.table.ids.tolist())
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def __contains__(self, id: object) -> bool:
+        return id in self._rows
+
+    def __repr__(self) -> str:
+        return repr(self.copy())
+
+    def copy(self) -> dict[int, Widget]:
+        """Shallow copy as a plain dictionary, as `dict.copy()`
+        """
+        return dict(self.items())
+
+
+def _detach(widget: Widget) -> Widget:
+    """The widget if it is unbound, otherwise an unbound copy with its own text lists
+    """
+    if widget._table is None: return widget
+    return Widget(
+        type=widget.type,
+        bbox=widget.bbox,
+        texts=list(widget.texts),
+        text_bboxes=list(widget.text_bboxes)
+    )
@@ -5,6 +5,7 @@ from dataclasses import dataclass, field
 
 if typing.TYPE_CHECKING:
     from .constants import Bbox
+    from .table import WidgetTable
 
 
 class WidgetType(Enum):
@@ -18,27 +19,71 @@ class WidgetType(Enum):
     SLIDER = "slider"
 
 
-@dataclass
+FIELDS = frozenset(["type", "bbox", "texts", "text_bboxes"])
+_set = object.__setattr__
+
+
+@dataclass(slots=True, repr=False, eq=False)
 class Widget:
+    # table row the widget is bound to, see `WidgetView`
+    _table: WidgetTable | None = field(default=None, init=False, compare=False)
+    _row: int = field(default=0, init=False, compare=False)
+
     type: WidgetType
     bbox: Bbox
     texts: list[str] = field(default_factory=list)
     text_bboxes: list[Bbox] = field(default_factory=list)
 
+    def __repr__(self) -> str:
+        return f"Widget(type={self.type!r}, bbox={self.bbox!r}, texts={self.texts!r}, text_bboxes={self.text_bboxes!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Widget): return NotImplemented
+        return (self.type, self.bbox, self.texts, self.text_bboxes) == (other.type, other.bbox, other.texts, other.text_bboxes)
+
+    def _bind(self, table: WidgetTable, row: int) -> None:
+        """Bind the widget to a table row, attribute assignments are then written to the table
+
+        Only bound widgets pay for the write-through: they become a `_BoundWidget`, which has 
+        the same slots, while unbound widgets are plain slotted dataclasses.
+        """
+        _set(self, "__class__", _BoundWidget)
+        _set(self, "_table", table)
+        _set(self, "_row", row)
+
+    def _unbind(self) -> None:
+        """Detach the widget from its table row, e.g. once removed from a screen, it keeps its values
+        """
+        _set(self, "__class__", Widget)
+        _set(self, "_table", None)
+        _set(self, "_row", 0)
+
     @property
     def width(self) -> float:
-        return self.bbox.xmax - self.bbox.xmin
+        xmin, _, xmax, _ = self.bbox
+        return xmax - xmin
     
     @property
     def height(self) -> float:
-        return self.bbox.ymax - self.bbox.ymin
+        _, ymin, _, ymax = self.bbox
+        return ymax - ymin
     
     @property
     def area(self) -> float:
-        return self.width * self.height
+        xmin, ymin, xmax, ymax = self.bbox
+        return (xmax - xmin) * (ymax - ymin)
     
     @property
     def center(self) -> tuple[float, float]:
-        cx = (self.bbox.xmin + self.bbox.xmax) / 2
-        cy = (self.bbox.ymin + self.bbox.ymax) / 2
-        return cx, cy
\ No newline at end of file
+        xmin, ymin, xmax, ymax = self.bbox
+        return (xmin + xmax) / 2, (ymin + ymax) / 2
+
+
+class _BoundWidget(Widget):
+    """A widget bound to a table row, see `Widget._bind()`
+    """
+    __slots__ = ()
+
+    def __setattr__(self, name: str, value) -> None:
+        if name in FIELDS and self._table is not None: self._table.set(self._row, name, value)
+        _set(self, name, value)
@@ -10,27 +10,330 @@ if typing.TYPE_CHECKING:
     from guipilot.entities import Screen, Widget
 
 
+# back-pointer moves of the alignment DP
+DIAG, UP, LEFT = 0, 1, 2
+
+
 class GUIPilotV2(WidgetMatcher):
-    def __init__(self, s1: int = 100, s2: int = 1) -> None:
+    def __init__(
+        self, 
+        s1: int = 100, 
+        s2: int = 1, 
+        band: int | None = None, 
+        band_y: float | None = None, 
+        verify_band: bool = False,
+        max_cells: int | None = None,
+        max_distance: float | None = None
+    ) -> None:
         """
         Params
             s1: scaling factor for distance score i.e. s1 * (abs(xi - xj) + abs(yi - yj))
             s2: scaling factor for shape score i.e. s2 * (abs(wi - wj) + abs(hi - hj))
+            band: if set, only align widget i with widgets j within `band` positions of the diagonal
+            band_y: if set, only align widgets whose normalized ymin differ by at most `band_y`
+            verify_band: if set, double the band and re-align while the optimal path touches its edge
+            max_cells: if set, screen pairs with more than `max_cells` widget pairs are aligned in linear space
+            max_distance: if set, only align widgets within this normalized distance i.e. abs(xi - xj) + abs(yi - yj). 
+                The DP still runs on a dense band, see `_match_sparse`, so this is no faster than full 
+                matching below about 300 widgets per screen, and about 2x faster at 1000 and 3x at 2000
         """
+        assert band is None or band_y is None, "band and band_y are mutually exclusive"
+        assert band is None or band >= 0
+        assert band_y is None or band_y > 0
+        assert max_cells is None or max_cells > 0
+        assert max_distance is None or max_distance >= 0
         self.s1, self.s2 = s1, s2
+        self.band, self.band_y = band, band_y
+        self.verify_band = verify_band
+        self.max_cells = max_cells
+        self.max_distance = max_distance
         super().__init__()
 
     def match(self, screen_i: Screen, screen_j: Screen) -> tuple[list[Pair], list[Score], float]:
         start_time = timer()
         widget_keys_i, widget_keys_j = list(screen_i.widgets.keys()), list(screen_j.widgets.keys())
-        scores = self._calculate_match_scores(screen_i, screen_j)
-        path = self._find_longest_matching_subsequence(scores)
+        m, n = len(widget_keys_i), len(widget_keys_j)
+        if self.max_distance is not None:
+            path, scores = self._match_sparse(screen_i, screen_j)
+        elif self.band is not None or self.band_y is not None:
+            path, scores, _ = self._match_banded(screen_i, screen_j)
+        elif self.max_cells is not None and m * n > self.max_cells:
+            path, scores = self._match_linear_space(screen_i, screen_j)
+        else:
+            scores = self._calculate_match_scores(screen_i, screen_j)
+            path = self._find_longest_matching_subsequence(scores)
+            scores = [scores[x, y] for (x, y) in path]
         pairs = [(widget_keys_i[x], widget_keys_j[y]) for x, y in path]
-        scores = [scores[x, y] for (x, y) in path]
         time = (timer() - start_time) * 1000
         return pairs, scores, int(time)
 
+    def match_banded(self, screen_i: Screen, screen_j: Screen) -> tuple[list[Pair], list[Score], float, bool]:
+        """Banded `match()`, also returns whether the optimal path touches the edge of the final band
+
+        A path that touches the edge may differ from the full alignment, see `verify_band`.
+        """
+        assert self.band is not None or self.band_y is not None, "band or band_y must be set"
+        start_time = timer()
+        widget_keys_i, widget_keys_j = list(screen_i.widgets.keys()), list(screen_j.widgets.keys())
+        path, scores, touched = self._match_banded(screen_i, screen_j)
+        pairs = [(widget_keys_i[x], widget_keys_j[y]) for x, y in path]
+        time = (timer() - start_time) * 1000
+        return pairs, scores, int(time), touched
+
+    def match_many(
+        self, 
+        screen_pairs: list[tuple[Screen, Screen]], 
+        batch_size: int = 32, 
+        batch_cells: int = 2**20
+    ) -> list[tuple[list[Pair], list[Score], float]]:
+        """See `WidgetMatcher.match_many`
+
+        Screen pairs are matched in batches of at most `batch_size` pairs and `batch_cells` padded 
+        cells, see `_plan_batches`: the widget features of a batch are stacked, scored as one 
+        padded `(batch, m, n)` tensor and aligned in a single DP sweep. The time reported for 
+        each pair is its share of the batch plus its own backtracking.
+
+        If `band`, `band_y`, `max_cells` or `max_distance` is set, nothing is batched: each pair 
+        is matched with `match()` in turn, and `batch_size` and `batch_cells` are ignored.
+        """
+        if self.band is not None or self.band_y is not None or self.max_cells is not None or self.max_distance is not None:
+            return super().match_many(screen_pairs)
+
+        results = [None] * len(screen_pairs)
+        for batch in self._plan_batches(screen_pairs, batch_size, batch_cells):
+            for k, result in zip(batch, self._match_batch([screen_pairs[k] for k in batch])):
+                results[k] = result
+        return results
+
+    def _match_batch(self, screen_pairs: list[tuple[Screen, Screen]]) -> list[tuple[list[Pair], list[Score], float]]:
+        """Match a batch of screen pairs, see `match_many`.
+        """
+        start_time = timer()
+        results = [([], [], 0) for _ in screen_pairs]
+        features_i = [self._get_features(screen_i) for screen_i, _ in screen_pairs]
+        features_j = [self._get_features(screen_j) for _, screen_j in screen_pairs]
+        counts_i = np.array([len(features[0]) for features in features_i])
+        counts_j = np.array([len(features[0]) for features in features_j])
+        batch = np.flatnonzero((counts_i > 0) & (counts_j > 0))
+        if len(batch) == 0:
+            return results
+
+        # index padded (batch, m, n) cells into the stacked features, padding repeats the last widget
+        stacked_i = tuple(np.concatenate([features_i[b][k] for b in batch]) for k in range(4))
+        stacked_j = tuple(np.concatenate([features_j[b][k] for b in batch]) for k in range(4))
+        counts_i, counts_j = counts_i[batch], counts_j[batch]
+        offsets_i, offsets_j = np.cumsum(counts_i) - counts_i, np.cumsum(counts_j) - counts_j
+        rows = offsets_i[:, None] + np.minimum(np.arange(counts_i.max()), counts_i[:, None] - 1)
+        cols = offsets_j[:, None] + np.minimum(np.arange(counts_j.max()), counts_j[:, None] - 1)
+        scores = self._score_pairs(stacked_i, stacked_j, rows[:, :, None], cols[:, None, :])
+        pointers = self._fill_pointers(scores)
+        batch_time = (timer() - start_time) / len(batch)
+
+        for k, b in enumerate(batch):
+            start_time = timer()
+            screen_i, screen_j = screen_pairs[b]
+            widget_keys_i, widget_keys_j = list(screen_i.widgets.keys()), list(screen_j.widgets.keys())
+            path = self._backtrack(pointers[k], counts_i[k], counts_j[k])
+            pairs = [(widget_keys_i[x], widget_keys_j[y]) for x, y in path]
+            path_scores = [scores[k, x, y] for x, y in path]
+            time = (batch_time + timer() - start_time) * 1000
+            results[b] = (pairs, path_scores, int(time))
+
+        return results
+
+    def _get_features(self, screen: Screen) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Extract per-widget geometry and types of a screen as arrays.
+
+        Returns:
+            np.ndarray: `(n, 4)` array of normalized `xmin, ymin, width, height`
+            np.ndarray: `(n,)` array of widget areas in pixels
+            np.ndarray: `(n,)` array of widget aspect ratios
+            np.ndarray: `(n,)` array of widget type codes
+        """
+        screen_height, screen_width, _ = screen.image.shape
+        bboxes = screen.table.bboxes.astype(np.float64)
+        types = screen.table.types
+        widths, heights = bboxes[:, 2] - bboxes[:, 0], bboxes[:, 3] - bboxes[:, 1]
+        xywh = np.column_stack([bboxes[:, 0], bboxes[:, 1], widths, heights])
+        norm = xywh / np.array([screen_width, screen_height, screen_width, screen_height], dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return norm, widths * heights, widths / heights, types
+
+    def _score_pairs(self, features_i: tuple, features_j: tuple, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        """Score widget pairs `(rows[k], cols[k])`, where `rows` and `cols` are broadcastable index arrays.
+
+        Performs the same floating point operations in the same order as 
+        `_calculate_match_scores_reference`, so results are bit-identical.
+        """
+        norm_i, area_i, ratio_i, types_i = features_i
+        norm_j, area_j, ratio_j, types_j = features_j
+        xi, yi, wi, hi = (norm_i[rows, k] for k in range(4))
+        xj, yj, wj, hj = (norm_j[cols, k] for k in range(4))
+
+        # distance score
+        score = self.s1 * (np.abs(xi - xj) + np.abs(yi - yj)) + self.s2 * (np.abs(wi - wj) + np.abs(hi - hj))
+        with np.errstate(divide="ignore"):
+            distance_score = np.where(score != 0, np.minimum(1 / score, 1), 1.0)
+
+        # area score
+        area_i, area_j = area_i[rows], area_j[cols]
+        area_score = np.minimum(area_i, area_j) / np.maximum(area_i, area_j)
+
+        # shape score
+        ratio_i, ratio_j = ratio_i[rows], ratio_j[cols]
+        shape_score = np.minimum(ratio_i, ratio_j) / np.maximum(ratio_i, ratio_j)
+
+        # type score
+        type_score = np.where(types_i[rows] == types_j[cols], 1.0, 0.01)
+
+        scores = distance_score * area_score * shape_score * type_score
+        return np.maximum(scores, 1e-8)
+
     def _calculate_match_scores(self, screen_i: Screen, screen_j: Screen) -> np.ndarray:
+        """Vectorized equivalent of `_calculate_match_scores_reference`.
+
+        Builds the distance, area, shape and type score matrices by broadcasting 
+        per-screen feature arrays, see `_score_pairs`.
+        """
+        features_i, features_j = self._get_features(screen_i), self._get_features(screen_j)
+        m, n = len(features_i[0]), len(features_j[0])
+        if m == 0 or n == 0:
+            return np.zeros((m, n))
+        return self._score_pairs(features_i, features_j, np.arange(m)[:, None], np.arange(n)[None, :])
+
+    def _get_band(self, features_i: tuple, features_j: tuple, band: int | None, band_y: float | None) -> tuple[np.ndarray, np.ndarray]:
+        """Calculate the columns `[lo[i], hi[i])` of the alignment matrix that widget i may be matched to.
+
+        Both bounds are made non-decreasing, as required by `_find_banded_subsequence`.
+        """
+        m, n = len(features_i[0]), len(features_j[0])
+        if band is not None:
+            center = np.arange(m) * n // m
+            lo, hi = center - band, center + band + 1
+        else:
+            y_i = features_i[0][:, 1]
+            y_j = np.maximum.accumulate(features_j[0][:, 1])
+            lo = np.searchsorted(y_j, y_i - band_y, side="left")
+            hi = np.searchsorted(y_j, y_i + band_y, side="right")
+
+        lo = np.maximum.accumulate(np.clip(lo, 0, n))
+        hi = np.maximum.accumulate(np.clip(hi, 0, n))
+        return lo, np.maximum(hi, lo)
+
+    def _match_banded(self, screen_i: Screen, screen_j: Screen) -> tuple[list[tuple], list[Score], bool]:
+        """Align widgets using scores and DP computed only inside the band.
+
+        If `verify_band` is set, the band is doubled until the optimal path no longer 
+        touches its edge or the band covers the whole alignment matrix. Also returns 
+        whether the final path touches the edge.
+        """
+        features_i, features_j = self._get_features(screen_i), self._get_features(screen_j)
+        m, n = len(features_i[0]), len(features_j[0])
+        if m == 0 or n == 0:
+            return [], [], False
+
+        band, band_y = self.band, self.band_y
+        while True:
+            lo, hi = self._get_band(features_i, features_j, band, band_y)
+            width = max(int(np.max(hi - lo)), 1)
+            cols = np.minimum(lo[:, None] + np.arange(width)[None, :], n - 1)
+            scores = self._score_pairs(features_i, features_j, np.arange(m)[:, None], cols)
+            path, touched = self._find_banded_subsequence(scores, lo, hi, n)
+
+            is_full = np.all(lo == 0) and np.all(hi == n)
+            if not (self.verify_band and touched) or is_full: break
+            if band is not None: band = 2 * band + 1
+            else: band_y *= 2
+
+        return path, [scores[x, y - lo[x]] for x, y in path], touched
+
+    def _match_sparse(self, screen_i: Screen, screen_j: Screen) -> tuple[list[tuple], list[Score]]:
+        """Align widgets using only candidate pairs within `max_distance`, see `WidgetMatcher._find_candidates`.
+
+        Candidate scores are laid out on the smallest band that covers them, and all other 
+        cells of the band are set to -inf so that they cannot be matched. Only scoring is sparse,
+        the band is allocated and swept densely, so the gain over full matching comes from the 
+        band being narrower than the screen, which pays off from a few hundred widgets.
+        """
+        features_i, features_j = self._get_features(screen_i), self._get_features(screen_j)
+        m, n = len(features_i[0]), len(features_j[0])
+        if m == 0 or n == 0:
+            return [], []
+
+        rows, cols = self._find_candidates(features_i[0][:, :2], features_j[0][:, :2], self.max_distance)
+        if len(rows) == 0:
+            return [], []
+
+        lo, hi = np.full(m, n), np.zeros(m, dtype=int)
+        np.minimum.at(lo, rows, cols)
+        np.maximum.at(hi, rows, cols + 1)
+        lo = np.minimum.accumulate(lo[::-1])[::-1]
+        hi = np.maximum(np.maximum.accumulate(hi), lo)
+
+        scores = np.full((m, int(np.max(hi - lo))), -np.inf)
+        scores[rows, cols - lo[rows]] = self._score_pairs(features_i, features_j, rows, cols)
+        path, _ = self._find_banded_subsequence(scores, lo, hi, n)
+        return path, [scores[x, y - lo[x]] for x, y in path]
+
+    def _find_banded_subsequence(self, D: np.ndarray, lo: np.ndarray, hi: np.ndarray, n: int) -> tuple[list[tuple], bool]:
+        """Banded variant of `_find_longest_matching_subsequence`.
+
+        Args:
+            D: `(m, k)` band of the score matrix, `D[i, c]` is the score of widget pair `(i, lo[i] + c)`
+            lo, hi: non-decreasing column bounds of the band, see `_get_band`
+            n: number of columns of the full score matrix
+
+        Returns:
+            list[tuple]: the optimal path, using only pairs inside the band
+            bool: True if a matched pair lies on an edge of the band that is not an edge of the matrix
+
+        Pairs outside the band cannot be matched. The DP row is kept in full, but only the 
+        band is updated: cells left of the band keep the value of the previous row, and cells 
+        right of the band equal the last cell of the band, which is filled in lazily as `hi` grows. 
+        When the band covers the whole matrix, the result equals `_find_longest_matching_subsequence`.
+        """
+        m, _ = D.shape
+        pointers = np.empty(D.shape, dtype=np.int8)
+        row, tail = np.zeros(n + 1), 0
+        for i in range(m):
+            l, h = lo[i], hi[i]
+            row[tail + 1:h + 1] = row[tail]
+            tail = h
+            if h == l: continue
+
+            up = row[l + 1:h + 1].copy()
+            diag = row[l:h] + D[i, :h - l]
+            candidates = np.maximum(up, diag)
+            candidates[0] = max(candidates[0], row[l])
+            np.maximum.accumulate(candidates, out=row[l + 1:h + 1])
+            curr = row[l + 1:h + 1]
+            pointers[i, :h - l] = np.where(curr == diag, DIAG, np.where(curr == up, UP, LEFT))
+
+        i, j = m, n
+        sequence, touched = [], False
+        while i > 0 and j > 0:
+            l, h = lo[i - 1], hi[i - 1]
+            if j > h:
+                j = h
+                continue
+            if j <= l:
+                i -= 1
+                continue
+
+            move = pointers[i - 1, j - 1 - l]
+            if move == DIAG:
+                touched |= (j - 1 == l and l > 0) or (j == h and h < n)
+                sequence.append((i - 1, j - 1))
+                i, j = i - 1, j - 1
+            elif move == UP:
+                i -= 1
+            else:
+                j -= 1
+        return sequence[::-1], bool(touched)
+
+    def _calculate_match_scores_reference(self, screen_i: Screen, screen_j: Screen) -> np.ndarray:
+        """Reference implementation of `_calculate_match_scores`, one widget pair at a time.
+        """
         def get_distance_score(si: Screen, sj: Screen, i: Widget, j: Widget) -> float:
             """Calculates Manhattan distance between normalized bboxes of widgets.
             """
@@ -76,7 +379,103 @@ class GUIPilotV2(WidgetMatcher):
 
         return scores
 
+    def _match_linear_space(self, screen_i: Screen, screen_j: Screen) -> tuple[list[tuple], list[Score]]:
+        """Align widgets in O(m + n + max_cells) memory, see `_find_subsequence_linear_space`.
+        """
+        features_i, features_j = self._get_features(screen_i), self._get_features(screen_j)
+        m, n = len(features_i[0]), len(features_j[0])
+        path = self._find_subsequence_linear_space(features_i, features_j, 0, m, 0, n)
+        if len(path) == 0:
+            return [], []
+        rows, cols = (np.array(x, dtype=int) for x in zip(*path))
+        return path, list(self._score_pairs(features_i, features_j, rows, cols))
+
+    def _find_subsequence_linear_space(self, features_i: tuple, features_j: tuple, r0: int, r1: int, c0: int, c1: int) -> list[tuple]:
+        """Hirschberg's divide-and-conquer variant of `_find_longest_matching_subsequence`.
+
+        Aligns widgets `[r0, r1)` with widgets `[c0, c1)`. The middle row is split at the column 
+        maximizing the sum of the forward DP of the top half and the backward DP of the bottom half, 
+        both computed with scores generated one row at a time. Sub-problems of at most `max_cells` 
+        cells are solved directly. Returns an optimal path, which is the same path as the dense DP 
+        unless several paths share the optimal score.
+        """
+        if r1 <= r0 or c1 <= c0:
+            return []
+        if r1 - r0 == 1 or (r1 - r0) * (c1 - c0) <= self.max_cells:
+            D = self._score_pairs(features_i, features_j, np.arange(r0, r1)[:, None], np.arange(c0, c1)[None, :])
+            pointers = self._fill_pointers(D)
+            return [(r0 + x, c0 + y) for x, y in self._backtrack(pointers, r1 - r0, c1 - c0)]
+
+        mid = (r0 + r1) // 2
+        cols = np.arange(c0, c1)
+        forward = self._last_row(features_i, features_j, range(r0, mid), cols)
+        backward = self._last_row(features_i, features_j, range(r1 - 1, mid - 1, -1), cols[::-1])[::-1]
+        total = forward + backward
+        split = c1 - int(np.argmax(total[::-1]))
+
+        return (
+            self._find_subsequence_linear_space(features_i, features_j, r0, mid, c0, split) + 
+            self._find_subsequence_linear_space(features_i, features_j, mid, r1, split, c1)
+        )
+
+    def _last_row(self, features_i: tuple, features_j: tuple, rows: range, cols: np.ndarray) -> np.ndarray:
+        """Last row of the alignment DP of widgets `rows` against widgets `cols`, in O(len(cols)) memory.
+        """
+        row = np.zeros(len(cols) + 1)
+        for i in rows:
+            diag = row[:-1] + self._score_pairs(features_i, features_j, i, cols)
+            np.maximum.accumulate(np.maximum(row[1:], diag), out=row[1:])
+        return row
+
     def _find_longest_matching_subsequence(self, D: np.ndarray) -> list[tuple]:
+        """Row-vectorized equivalent of `_find_longest_matching_subsequence_reference`.
+
+        Each DP row is computed as a whole: `max(up, diag + D)` followed by a running 
+        maximum along the row to account for the left move. Moves are recorded in an 
+        int8 back-pointer table, so backtracking does not compare floats and follows 
+        the same diagonal > up > left preference as the reference.
+        """
+        m, n = D.shape
+        if m == 0 or n == 0:
+            return []
+        pointers = self._fill_pointers(D)
+        return self._backtrack(pointers, m, n)
+
+    def _fill_pointers(self, D: np.ndarray) -> np.ndarray:
+        """Fill the DP table row by row and return the `(m, n)` back-pointer table.
+
+        Leading dimensions of `D` are treated as a batch of independent score matrices.
+        """
+        m, n = D.shape[-2:]
+        pointers = np.empty(D.shape, dtype=np.int8)
+        prev = np.zeros(D.shape[:-2] + (n + 1,))
+        curr = np.zeros(D.shape[:-2] + (n + 1,))
+        for i in range(m):
+            up = prev[..., 1:]
+            diag = prev[..., :-1] + D[..., i, :]
+            np.maximum.accumulate(np.maximum(up, diag), axis=-1, out=curr[..., 1:])
+            pointers[..., i, :] = np.where(curr[..., 1:] == diag, DIAG, np.where(curr[..., 1:] == up, UP, LEFT))
+            prev, curr = curr, prev
+        return pointers
+
+    def _backtrack(self, pointers: np.ndarray, i: int, j: int) -> list[tuple]:
+        """Follow back-pointers from cell `(i, j)` of the DP table to its border.
+        """
+        sequence = []
+        while i > 0 and j > 0:
+            move = pointers[i - 1, j - 1]
+            if move == DIAG:
+                sequence.append((i - 1, j - 1))
+                i, j = i - 1, j - 1
+            elif move == UP:
+                i -= 1
+            else:
+                j -= 1
+        return sequence[::-1]
+
+    def _find_longest_matching_subsequence_reference(self, D: np.ndarray) -> list[tuple]:
+        """Reference implementation of `_find_longest_matching_subsequence`, one cell at a time.
+        """
         m, n = D.shape
         if m == 0 or n == 0:
             return []
@@ -96,4 +495,4 @@ class GUIPilotV2(WidgetMatcher):
                 i -= 1
             else:
                 j -= 1
-        return sequence[::-1]
\ No newline at end of file
+        return sequence[::-1]
@@ -1,5 +1,8 @@
 from __future__ import annotations
 import typing
+import hashlib
+import threading
+from collections import OrderedDict
 from timeit import default_timer as timer
 
 import numpy as np
@@ -12,11 +15,159 @@ if typing.TYPE_CHECKING:
     
 
 class GVT(WidgetMatcher):
-    def __init__(self, threshold) -> None:
+    def __init__(self, threshold, cache_size: int = 64) -> None:
+        """
+        Params
+            threshold: maximum Manhattan distance between normalized `x, y, w, h` of paired widgets
+            cache_size: number of fitted nearest neighbour indices kept for reuse, see `_get_index`
+        """
         super().__init__()
         self.threshold = threshold
+        self.cache_size = cache_size
+        # fitted nearest neighbour indices keyed by screen fingerprint, the matcher may be shared by threads
+        self._index_cache: OrderedDict[str, NearestNeighbors] = OrderedDict()
+        self._index_lock = threading.Lock()
 
-    def match(self, screen_i: Screen, screen_j: Screen) -> tuple[list[Pair], list[Score], float]:
+    def match(
+        self, 
+        screen_i: Screen, 
+        screen_j: Screen, 
+        points_i: np.ndarray | None = None, 
+        points_j: np.ndarray | None = None
+    ) -> tuple[list[Pair], list[Score], float]:
+        """See `WidgetMatcher.match`
+
+        Args:
+            points_i, points_j: optional precomputed `(n, 4)` arrays of normalized `x, y, w, h`, 
+                in the order of `screen.widgets`, see `WidgetMatcher._norm_xywh_array`
+        """
+        start_time = timer()
+        widget_keys_i, widget_keys_j = list(screen_i.widgets.keys()), list(screen_j.widgets.keys())
+        if points_i is None: points_i = self._norm_xywh_array(screen_i)
+        if points_j is None: points_j = self._norm_xywh_array(screen_j)
+
+        distances, indices = self._get_index(points_j).kneighbors(points_i)
+
+        rows, cols = self._pair_greedy(distances[:, 0], indices[:, 0], widget_keys_i, widget_keys_j)
+        pairs = [(widget_keys_i[i], widget_keys_j[j]) for i, j in zip(rows, cols)]
+        with np.errstate(divide="ignore"):
+            scores = list(1 / distances[rows, 0])
+
+        time = (timer() - start_time) * 1000
+        return pairs, scores, int(time)
+
+    def match_many(
+        self, 
+        screen_pairs: list[tuple[Screen, Screen]], 
+        batch_size: int = 32, 
+        batch_cells: int = 2**20
+    ) -> list[tuple[list[Pair], list[Score], float]]:
+        """See `WidgetMatcher.match_many`
+
+        Screen pairs are matched in batches of at most `batch_size` pairs and `batch_cells` padded 
+        cells, see `_plan_batches`: the normalized bboxes of a batch are stacked and padded, and 
+        nearest neighbours are found by brute force on the padded `(batch, m, n)` distance 
+        tensor instead of fitting an index per pair. Pairs larger than `batch_cells` on their 
+        own are matched with `match()`. The time reported for each pair is its share of the 
+        batch plus its own greedy pairing.
+        """
+        results = [None] * len(screen_pairs)
+        for batch in self._plan_batches(screen_pairs, batch_size, batch_cells):
+            screen_i, screen_j = screen_pairs[batch[0]]
+            if len(batch) == 1 and len(screen_i.widgets) * len(screen_j.widgets) > batch_cells:
+                results[batch[0]] = self.match(screen_i, screen_j)
+                continue
+            for k, result in zip(batch, self._match_batch([screen_pairs[k] for k in batch])):
+                results[k] = result
+        return results
+
+    def _match_batch(self, screen_pairs: list[tuple[Screen, Screen]]) -> list[tuple[list[Pair], list[Score], float]]:
+        """Match a batch of screen pairs, see `match_many`.
+        """
+        start_time = timer()
+        results = [([], [], 0) for _ in screen_pairs]
+        points_i = [self._norm_xywh_array(screen_i) for screen_i, _ in screen_pairs]
+        points_j = [self._norm_xywh_array(screen_j) for _, screen_j in screen_pairs]
+        batch = [b for b in range(len(screen_pairs)) if len(points_i[b]) > 0 and len(points_j[b]) > 0]
+        if len(batch) == 0:
+            return results
+
+        # pad screen_j with infinitely distant widgets so that they are never the nearest neighbour
+        m, n = max(len(points_i[b]) for b in batch), max(len(points_j[b]) for b in batch)
+        padded_i, padded_j = np.zeros((len(batch), m, 4)), np.full((len(batch), n, 4), np.inf)
+        for k, b in enumerate(batch):
+            padded_i[k, :len(points_i[b])] = points_i[b]
+            padded_j[k, :len(points_j[b])] = points_j[b]
+
+        distances = np.zeros((len(batch), m, n))
+        for dim in range(4):
+            distances += np.abs(padded_i[:, :, None, dim] - padded_j[:, None, :, dim])
+        indices = np.argmin(distances, axis=2)
+        distances = np.take_along_axis(distances, indices[:, :, None], axis=2)[:, :, 0]
+        batch_time = (timer() - start_time) / len(batch)
+
+        for k, b in enumerate(batch):
+            start_time = timer()
+            screen_i, screen_j = screen_pairs[b]
+            widget_keys_i, widget_keys_j = list(screen_i.widgets.keys()), list(screen_j.widgets.keys())
+            nearest, nearest_distances = indices[k, :len(points_i[b])], distances[k, :len(points_i[b])]
+            rows, cols = self._pair_greedy(nearest_distances, nearest, widget_keys_i, widget_keys_j)
+            pairs = [(widget_keys_i[i], widget_keys_j[j]) for i, j in zip(rows, cols)]
+            with np.errstate(divide="ignore"):
+                scores = list(1 / nearest_distances[rows])
+            time = (batch_time + timer() - start_time) * 1000
+            results[b] = (pairs, scores, int(time))
+
+        return results
+
+    def _get_index(self, points: np.ndarray) -> NearestNeighbors:
+        """Get a nearest neighbour index fitted on `points`, reusing indices of previously seen screens
+        """
+        key = hashlib.blake2b(points.tobytes(), digest_size=16).hexdigest() + str(points.shape)
+        with self._index_lock:
+            knn = self._index_cache.get(key)
+            if knn is not None:
+                self._index_cache.move_to_end(key)
+                return knn
+
+        knn = NearestNeighbors(n_neighbors=1, metric="manhattan")
+        knn.fit(points)
+        with self._index_lock:
+            self._index_cache[key] = knn
+            while len(self._index_cache) > self.cache_size:
+                self._index_cache.popitem(last=False)
+        return knn
+
+    def _pair_greedy(self, distances: np.ndarray, indices: np.ndarray, keys_i: list, keys_j: list) -> tuple[np.ndarray, np.ndarray]:
+        """Greedily pair each widget i with its nearest neighbour `indices[i]`, closest first.
+
+        As in `_match_reference`, ties keep the order of widget i, pairs further than `threshold` 
+        are discarded, and a pair is skipped if the key of either widget was already paired, 
+        with keys of both screens sharing one set. Returns the paired indices, ordered by distance.
+
+        Sorting and the threshold are vectorized, but claims are checked one pair at a time: 
+        since both screens share one set of keys, a claim on the keys of one screen can block 
+        pairs of the other, which a per-screen claimed mask cannot express. The loop is linear 
+        in the number of widgets within `threshold` and is not where matching spends its time.
+        """
+        order = np.argsort(distances, kind="stable")
+        order = order[distances[order] <= self.threshold]
+
+        paired_ids, rows = set(), []
+        for i in order.tolist():
+            widget_i, widget_j = keys_i[i], keys_j[indices[i]]
+            if widget_i in paired_ids or widget_j in paired_ids:
+                continue
+            rows.append(i)
+            paired_ids.add(widget_i)
+            paired_ids.add(widget_j)
+
+        rows = np.array(rows, dtype=int)
+        return rows, indices[rows]
+
+    def _match_reference(self, screen_i: Screen, screen_j: Screen) -> tuple[list[Pair], list[Score], float]:
+        """Reference implementation of `match`, fitting an index per call and pairing one widget at a time.
+        """
         start_time = timer()
         widget_keys_i, widget_keys_j = list(screen_i.widgets.keys()), list(screen_j.widgets.keys())
         points_i = np.array([list(self._norm_xywh(screen_i, widget)) for widget in screen_i.widgets.values()])
@@ -43,11 +194,12 @@ class GVT(WidgetMatcher):
 
                 # Add pair to the list
                 pairs.append((widget_i, widget_j))
-                scores.append(1 / distance[0])
+                with np.errstate(divide="ignore"):
+                    scores.append(1 / distance[0])
 
                 # Mark widgets as paired
                 paired_ids.add(widget_i)
                 paired_ids.add(widget_j)
 
         time = (timer() - start_time) * 1000
-        return pairs, scores, int(time)
\ No newline at end of file
+        return pairs, scores, int(time)
@@ -3,6 +3,8 @@ import typing
 from typing import TypeAlias
 from abc import ABC, abstractmethod
 
+import numpy as np
+
 from guipilot.entities import Bbox
 
 if typing.TYPE_CHECKING:
@@ -26,6 +28,41 @@ class WidgetMatcher(ABC):
             widget IDs. `x` is from `screen_i` and `y` is from `screen_j`.
         """
         pass
+
+    def match_many(self, screen_pairs: list[tuple[Screen, Screen]]) -> list[tuple[list[Pair], list[Score], float]]:
+        """Match widgets between many pairs of screens
+
+        Args:
+            screen_pairs: a list of `(screen_i, screen_j)` tuples
+
+        Returns:
+            A list with the result of `match()` for each pair of screens, in the same order.
+        """
+        return [self.match(screen_i, screen_j) for screen_i, screen_j in screen_pairs]
+
+    def _plan_batches(self, screen_pairs: list[tuple[Screen, Screen]], batch_size: int, batch_cells: int) -> list[list[int]]:
+        """Group screen pairs into batches for `match_many`
+
+        Pairs are sorted by their number of widget pairs, so that screens of similar sizes are 
+        padded together, and a batch is closed once its padded `(batch, m, n)` tensor would 
+        exceed `batch_cells` cells. A pair larger than `batch_cells` is matched on its own.
+
+        Returns:
+            indices into `screen_pairs` of each batch
+        """
+        sizes = [(len(screen_i.widgets), len(screen_j.widgets)) for screen_i, screen_j in screen_pairs]
+        order = sorted(range(len(screen_pairs)), key=lambda k: sizes[k][0] * sizes[k][1])
+
+        batches, batch, m, n = [], [], 0, 0
+        for k in order:
+            new_m, new_n = max(m, sizes[k][0]), max(n, sizes[k][1])
+            if batch and (len(batch) == batch_size or (len(batch) + 1) * new_m * new_n > batch_cells):
+                batches.append(batch)
+                batch, new_m, new_n = [], sizes[k][0], sizes[k][1]
+            batch.append(k)
+            m, n = new_m, new_n
+        if batch: batches.append(batch)
+        return batches
     
     def _norm_xywh(self, screen: Screen, widget: Widget) -> tuple[float, float, float, float]:
         """Calculate the normalized bounding box of a widget
@@ -38,4 +75,62 @@ class WidgetMatcher(ABC):
         assert 0 <= xmin <= 1 and 0 <= xmax <= 1
         assert 0 <= ymin <= 1 and 0 <= ymax <= 1
         assert xmin <= xmax and ymin <= ymax
-        return xmin, ymin, xmax - xmin, ymax - ymin
\ No newline at end of file
+        return xmin, ymin, xmax - xmin, ymax - ymin
+
+    def _norm_xywh_array(self, screen: Screen) -> np.ndarray:
+        """Calculate the normalized bounding boxes of all widgets, see `_norm_xywh`
+
+        Returns:
+            `(n, 4)` array of normalized `x, y, w, h`, in the order of `screen.widgets`
+        """
+        screen_height, screen_width, _ = screen.image.shape
+        bboxes = screen.table.bboxes.astype(np.float64)
+        bboxes /= np.array([screen_width, screen_height, screen_width, screen_height], dtype=np.float64)
+        assert screen_height > screen_width
+        assert np.all((0 <= bboxes) & (bboxes <= 1))
+        assert np.all(bboxes[:, :2] <= bboxes[:, 2:])
+        bboxes[:, 2:] -= bboxes[:, :2]
+        return bboxes
+
+    def _find_candidates(self, points_i: np.ndarray, points_j: np.ndarray, max_distance: float) -> tuple[np.ndarray, np.ndarray]:
+        """Find all pairs of widgets whose normalized positions are within a Manhattan distance
+
+        Args:
+            points_i, points_j: `(n, 2)` arrays of normalized `x, y` widget positions
+            max_distance: maximum `abs(xi - xj) + abs(yi - yj)` of a candidate pair
+
+        Returns:
+            Two arrays `rows, cols` of candidate pairs `(i, j)`, sorted by `i` then `j`.
+
+        Widgets in `points_j` are bucketed on a grid of `max_distance` cells, sorted by cell,
+        so that each widget `i` is only compared against the widgets in the 3 x 3 cells around
+        its own, a constant multiple of the candidates rather than a full strip of rows.
+        """
+        if len(points_i) == 0 or len(points_j) == 0:
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+
+        # cells are slightly larger than max_distance, so that rounding never puts candidates two cells apart,
+        # and shifted by one so that the neighbours of the first row and column are valid keys
+        cell_size = max_distance * (1 + 1e-6) + 1e-9
+        points = np.concatenate([points_i, points_j])
+        cells = np.floor((points - points.min(axis=0)) / cell_size).astype(np.int64) + 1
+        stride = cells[:, 1].max() + 2
+        keys = cells[:, 0] * stride + cells[:, 1]
+        keys_i, keys_j = keys[:len(points_i)], keys[len(points_i):]
+
+        order = np.argsort(keys_j, kind="stable")
+        keys_j = keys_j[order]
+        neighbours = np.array([dx * stride + dy for dx in (-1, 0, 1) for dy in (-1, 0, 1)])
+        queries = keys_i[:, None] + neighbours[None, :]
+        lo = np.searchsorted(keys_j, queries, side="left").ravel()
+        hi = np.searchsorted(keys_j, queries, side="right").ravel()
+
+        counts = hi - lo
+        rows = np.repeat(np.arange(len(points_i)).repeat(len(neighbours)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        cols = order[np.repeat(lo, counts) + offsets]
+
+        distances = np.abs(points_i[rows] - points_j[cols]).sum(axis=1)
+        rows, cols = rows[distances <= max_distance], cols[distances <= max_distance]
+        sorted_indices = np.lexsort((cols, rows))
+        return rows[sorted_indices], cols[sorted_indices]
@@ -1,2 +1,15 @@
-from .detector.detector import Detector
-from .ocr.ocr import OCR
\ No newline at end of file
+from . import registry
+
+
+def __getattr__(name: str):
+    # models are imported on first access, see `registry`
+    if name == "OCR":
+        from .ocr.ocr import OCR
+        return OCR
+    if name == "Detector":
+        from .detector.detector import Detector
+        return Detector
+    if name == "Transport":
+        from .transport import Transport
+        return Transport
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,127 @@
+from __future__ import annotations
+import os
+import json
+import sqlite3
+import hashlib
+import functools
+import threading
+from collections import OrderedDict
+from typing import Any
+
+import numpy as np
+
+
+def image_key(image: np.ndarray, *config) -> str:
+    """Content hash of an image and the model configuration it is processed with
+    """
+    image = np.ascontiguousarray(image)
+    digest = hashlib.sha256()  # hardware accelerated on most CPUs, faster than blake2b on full screenshots
+    digest.update(f"{image.shape}{image.dtype}{config!r}".encode("utf-8"))
+    digest.update(memoryview(image).cast("B"))
+    return digest.hexdigest()[:32]
+
+
+def file_key(path: str) -> str:
+    """Content hash of a file, e.g. model weights, memoized by path, size and modification time
+    """
+    stat = os.stat(path)
+    return _file_key(os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=None)
+def _file_key(path: str, size: int, mtime: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""): digest.update(chunk)
+    return digest.hexdigest()[:32]
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, (np.ndarray, np.generic)): return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class ResultCache():
+    """Cache of model results by content key, with an LRU memory tier and an optional sqlite disk tier
+
+    Values must be JSON serializable (numpy arrays become lists), they are stored as JSON and 
+    decoded on every hit, so that callers get a fresh copy. The cache is thread-safe.
+    """
+    def __init__(self, size: int = 1024, path: str | None = None) -> None:
+        """
+        Params
+            size: maximum number of results kept in memory
+            path: sqlite file of the disk tier, which persists across runs, no disk tier if None
+        """
+        assert size >= 0
+        self.size = size
+        self.path = path
+        self.hits, self.disk_hits, self.misses = 0, 0, 0
+        self._memory: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")  # with WAL, a crash can only lose the latest results
+            self._db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT)")
+            self._db.commit()
+
+    def get(self, key: str) -> Any | None:
+        """Get a result, None if it is not cached
+        """
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return json.loads(value)
+
+            if self._db is not None:
+                row = self._db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._remember(key, row[0])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return json.loads(row[0])
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: Any) -> None:
+        """Cache a result
+        """
+        value = json.dumps(value, default=_to_json)
+        with self._lock:
+            self._remember(key, value)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO results VALUES (?, ?)", (key, value))
+                self._db.commit()
+
+    def _remember(self, key: str, value: str) -> None:
+        if self.size == 0: return
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.size: self._memory.popitem(last=False)
+
+    def stats(self) -> dict[str, float]:
+        """Hit and miss counts, and the hit rate
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+    def clear(self) -> None:
+        """Remove all results from both tiers and reset the counters
+        """
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+            self.hits, self.disk_hits, self.misses = 0, 0, 0
@@ -1,43 +1,255 @@
 import os
-import base64
+import typing
+import asyncio
 
-import cv2
-import torch
-import requests
 import numpy as np
-from ultralytics import YOLO
-from ultralytics.engine.results import Results
+import requests
+
+from .ops import downscale, merge_tiles
+from ..cache import ResultCache, image_key, file_key
+from ..transport import Transport, AsyncLimiter, default_transport, encode_image, encode_images, batch_results, ENCODINGS
+
+if typing.TYPE_CHECKING:
+    from ultralytics.engine.results import Results
+
+
+# how the local model is run, see `Detector`
+RUNTIMES = ("torch", "onnx", "onnx-int8")
 
 
 class Detector():
-    def __init__(self, service_url: str = None) -> None:
+    def __init__(
+        self, 
+        service_url: str = None, 
+        transport: Transport = None, 
+        encoding: str = "jpeg", 
+        batch_url: str = None,
+        concurrency: int = 8,
+        conf: float = 0.25,
+        iou: float = 0.7,
+        cache_size: int = 1024,
+        cache_path: str = None,
+        runtime: str = "torch",
+        threads: int = None,
+        tile_height: int = None,
+        tile_overlap: float = 0.25,
+        upload_size: int = None
+    ) -> None:
+        """
+        Params
+            service_url: URL of the model service, the model is run locally if None
+            transport: HTTP client for the service, defaults to a shared connection pool
+            encoding: how images are sent to the service, see `transport.ENCODINGS`
+            batch_url: URL of the service's batch endpoint, defaults to `{service_url}/batch`
+            concurrency: maximum number of requests in flight from `acall()` and `abatch()`, 
+                the local backend runs one call at a time
+            conf, iou: confidence and NMS IoU thresholds of the local model
+            cache_size: number of results cached in memory by image content, see `cache.ResultCache`
+            cache_path: sqlite file to also cache results on disk, across runs
+            runtime: how the local model is run, one of `RUNTIMES`, "torch" runs `best.pt` with 
+                Ultralytics on GPU if available, "onnx" and "onnx-int8" run it on CPU with 
+                ONNX Runtime, exported once next to the weights, see `runtime.export_onnx()`
+            threads: number of CPU threads per inference of the local model, all cores if None
+            tile_height: images taller than this are detected in full-width tiles of this height, 
+                batched through the model, e.g. scroll-captured screenshots. No tiling if None
+            tile_overlap: fraction of `tile_height` shared by consecutive tiles, widgets at most 
+                this tall are whole on at least one tile
+            upload_size: images are shrunk to fit this square before they are sent to the service, 
+                e.g. the model's input size, and bboxes are scaled back. Full resolution if None
+        """
+        assert encoding in ENCODINGS, f"unknown image encoding: {encoding}"
+        assert runtime in RUNTIMES, f"unknown detector runtime: {runtime}"
+        assert tile_height is None or (tile_height > 0 and 0 <= tile_overlap < 1)
+        assert upload_size is None or upload_size > 0
         self.service_url = service_url
+        self.encoding = encoding
+        self.batch_url = batch_url if batch_url is not None or service_url is None else f"{service_url.rstrip('/')}/batch"
+        self.transport = transport if transport is not None else default_transport()
+        self.limiter = AsyncLimiter(concurrency if service_url is not None else 1)
+        self.conf, self.iou = conf, iou
+        self.runtime = runtime
+        self.tile_height, self.tile_overlap = tile_height, tile_overlap
+        self.upload_size = upload_size
+        self.cache = ResultCache(cache_size, cache_path) if cache_size > 0 or cache_path is not None else None
 
         if service_url is None:
-            device = "cuda" if torch.cuda.is_available() else "cpu"
             base_path = os.path.dirname(os.path.abspath(__file__))
-            self.detector = YOLO(f"{base_path}/best.pt").to(device)
+            weights = f"{base_path}/best.pt"
+            if runtime == "torch":
+                # heavy imports, only needed for the local backend
+                import torch
+                from ultralytics import YOLO
+
+                device = "cuda" if torch.cuda.is_available() else "cpu"
+                if threads is not None: torch.set_num_threads(threads)
+                self.detector = YOLO(weights).to(device)
+            else:
+                from .runtime import OnnxModel, export_onnx
+                self.detector = OnnxModel(export_onnx(weights, quantize=runtime == "onnx-int8"), threads)
+            self.config = ("detector", file_key(weights), runtime, conf, iou, tile_height, tile_overlap)
+        else:
+            self.config = ("detector", service_url, encoding, tile_height, tile_overlap, upload_size)
+
+    def _local(self, image: np.ndarray) -> tuple[np.ndarray, list]:
+        return self._local_batch([image])[0]
+
+    def _local_batch(self, images: list[np.ndarray]) -> list[tuple[np.ndarray, list]]:
+        # a list of images is predicted as one batch
+        if self.runtime != "torch":
+            predictions = self.detector.predict(images, self.conf, self.iou)
+            return [self._to_widgets(bboxes, class_ids) for bboxes, _, class_ids in predictions]
 
-    def _local(self, image: np.ndarray) -> tuple[list, list]:
-        results: list[Results] = self.detector(image, verbose=False)
-        bboxes = results[0].boxes.xyxy.cpu().numpy() 
-        class_ids = results[0].boxes.cls.cpu().numpy()
+        results: list[Results] = self.detector(images, verbose=False, conf=self.conf, iou=self.iou)
+        return [self._to_widgets(result.boxes.xyxy.cpu().numpy(), result.boxes.cls.cpu().numpy()) for result in results]
+
+    def _to_widgets(self, bboxes: np.ndarray, class_ids: np.ndarray) -> tuple[np.ndarray, list]:
         sorted_indices = np.lexsort((bboxes[:, 0], bboxes[:, 1])) 
         sorted_bboxes = bboxes[sorted_indices]
         sorted_class_ids = class_ids[sorted_indices]
         sorted_widget_types = [self.detector.names[int(class_id)] for class_id in sorted_class_ids]
         return sorted_bboxes, sorted_widget_types
 
-    def __call__(self, image: np.ndarray):
-        if self.service_url is None: return self._local(image)
+    def _service(self, image: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        image, ratio = self._shrink(image)
+        data: dict = self.transport.post(self.service_url, **encode_image(image, self.encoding))
+        return _sort(data.get("class"), data.get("box"), ratio)
 
-        _, buffer = cv2.imencode(".jpg", image)
-        img_base64 = base64.b64encode(buffer).decode('utf-8')
-        response = requests.post(self.service_url, data={"image_array": img_base64})
-        data: dict = response.json()
-        widget_types = np.array(data.get("class"))
-        bboxes = np.array(data.get("box"))
-        sorted_indices = np.lexsort((bboxes[:, 0], bboxes[:, 1])) 
-        sorted_bboxes = bboxes[sorted_indices]
-        sorted_widget_types = widget_types[sorted_indices]
-        return sorted_bboxes, sorted_widget_types
\ No newline at end of file
+    def _service_batch(self, images: list[np.ndarray]) -> list[tuple[np.ndarray, np.ndarray]]:
+        """Send images in one request to the batch endpoint, falls back to a request per image
+
+        The batch endpoint responds with per-image lists `{"class": [[...], ...], "box": [[...], ...]}`.
+
+        Raises:
+            RuntimeError: if the response does not have one entry per image
+        """
+        if self.batch_url is not None:
+            try:
+                uploads, ratios = zip(*[self._shrink(image) for image in images]) if images else ((), ())
+                data: dict = self.transport.post(self.batch_url, **encode_images(list(uploads), self.encoding))
+            except requests.HTTPError as e:
+                if e.response.status_code not in (404, 405, 501): raise
+                self.batch_url = None  # batching is not supported by the service
+            else:
+                return [
+                    _sort(widget_types, bboxes, ratio) 
+                    for (widget_types, bboxes), ratio in zip(batch_results(data, ("class", "box"), len(images)), ratios)
+                ]
+
+        return [self._service(image) for image in images]
+
+    def _shrink(self, image: np.ndarray) -> tuple[np.ndarray, float]:
+        """Shrink an image to `upload_size` before it is sent, returns the image and the resize ratio
+        """
+        if self.upload_size is None: return image, 1.0
+        return downscale(image, self.upload_size)
+
+    def __call__(self, image: np.ndarray) -> tuple[np.ndarray, list]:
+        key = image_key(image, *self.config) if self.cache is not None else None
+        if key is not None:
+            result = self.cache.get(key)
+            if result is not None: return self._from_cache(result)
+
+        result = self._run([image], 16)[0]
+        if key is not None: self.cache.put(key, result)
+        return result
+
+    def detect_many(self, images: list[np.ndarray], batch_size: int = 16) -> list[tuple[np.ndarray, list]]:
+        """Detect widgets on images in batches of `batch_size`, cached images are not run
+
+        The local model predicts each batch in one forward pass, the service gets one request per batch.
+
+        Returns:
+            sorted `(bboxes, widget_types)` of each image, in order, as `__call__()` returns
+        """
+        assert batch_size > 0
+        results: list = [None] * len(images)
+        keys = [image_key(image, *self.config) for image in images] if self.cache is not None else None
+        if keys is not None:
+            for i, key in enumerate(keys):
+                result = self.cache.get(key)
+                if result is not None: results[i] = self._from_cache(result)
+        misses = [i for i, result in enumerate(results) if result is None]
+
+        for i, result in zip(misses, self._run([images[i] for i in misses], batch_size)):
+            results[i] = result
+            if keys is not None: self.cache.put(keys[i], result)
+        return results
+
+    def _run(self, images: list[np.ndarray], batch_size: int) -> list[tuple[np.ndarray, list]]:
+        """Run the model on images in batches of `batch_size`, tall images are split into tiles first
+        """
+        crops, tiles = [], []
+        for image in images:
+            tiles.append(self._tiles(image.shape[0]))
+            crops += [image[ymin:ymax] for ymin, ymax in tiles[-1]]
+
+        outputs = []
+        for start in range(0, len(crops), batch_size):
+            chunk = crops[start:start + batch_size]
+            if len(chunk) == 1:
+                outputs.append(self._local(chunk[0]) if self.service_url is None else self._service(chunk[0]))
+            else:
+                outputs += self._local_batch(chunk) if self.service_url is None else self._service_batch(chunk)
+
+        results, start = [], 0
+        for image, image_tiles in zip(images, tiles):
+            parts = outputs[start:start + len(image_tiles)]
+            start += len(image_tiles)
+            results.append(parts[0] if len(parts) == 1 else self._merge_tiles(parts, image_tiles))
+        return results
+
+    def _tiles(self, height: int) -> list[tuple[int, int]]:
+        """`(ymin, ymax)` of the tiles of an image, the last tile ends at the bottom of the image
+        """
+        if self.tile_height is None or height <= self.tile_height: return [(0, height)]
+        stride = max(int(self.tile_height * (1 - self.tile_overlap)), 1)
+        starts = list(range(0, height - self.tile_height, stride)) + [height - self.tile_height]
+        return [(ymin, ymin + self.tile_height) for ymin in starts]
+
+    def _merge_tiles(self, parts: list[tuple[np.ndarray, list]], tiles: list[tuple[int, int]]) -> tuple[np.ndarray, list]:
+        """Map detections of tiles to image coordinates and merge the duplicates at the seams, see `ops.merge_tiles()`
+        """
+        counts = [len(bboxes) for bboxes, _ in parts]
+        dtype = np.result_type(*[np.asarray(bboxes).dtype for bboxes, _ in parts])
+        bboxes = np.concatenate([np.asarray(bboxes, dtype=np.float64).reshape(-1, 4) for bboxes, _ in parts])
+        widget_types = np.array([widget_type for _, part_types in parts for widget_type in part_types], dtype=object)
+        tile_ids = np.repeat(np.arange(len(tiles)), counts)
+        bboxes[:, [1, 3]] += np.array(tiles, dtype=np.float64)[tile_ids, :1]
+
+        _, class_ids = np.unique(widget_types.astype(str), return_inverse=True)
+        keep, merged = merge_tiles(bboxes, class_ids, tile_ids, np.array(tiles))
+        sorted_indices = np.lexsort((merged[:, 0], merged[:, 1]))
+        sorted_bboxes = merged[sorted_indices].astype(dtype)
+        sorted_widget_types = widget_types[keep][sorted_indices]
+        if self.service_url is None: return sorted_bboxes, sorted_widget_types.tolist()
+        return sorted_bboxes, sorted_widget_types.astype(str)
+
+    def _from_cache(self, result: list) -> tuple[np.ndarray, list]:
+        """Convert a cached result back to the types returned by the backend
+        """
+        bboxes, widget_types = result
+        if self.service_url is None: return np.asarray(bboxes, dtype=np.float32).reshape(-1, 4), widget_types
+        return np.array(bboxes).reshape(-1, 4), np.array(widget_types)
+
+    async def acall(self, image: np.ndarray) -> tuple[np.ndarray, list]:
+        """`__call__()` in a worker thread, off the event loop, under the concurrency limit, see `AsyncLimiter`
+        """
+        return await self.limiter.run(self, image)
+
+    async def abatch(self, images: list[np.ndarray], batch_size: int = 16) -> list[tuple[np.ndarray, list]]:
+        """`detect_many()` with batches run in worker threads, awaited concurrently under the concurrency limit
+        """
+        assert batch_size > 0
+        chunks = [images[start:start + batch_size] for start in range(0, len(images), batch_size)]
+        chunk_results = await asyncio.gather(*[self.limiter.run(self.detect_many, chunk, batch_size) for chunk in chunks])
+        return [result for chunk_result in chunk_results for result in chunk_result]
+
+
+def _sort(widget_types: list[str], bboxes: list[list[float]], ratio: float = 1.0) -> tuple[np.ndarray, np.ndarray]:
+    """Sort service detections top to bottom, then left to right, bboxes on an image resized by `ratio` are scaled back
+    """
+    widget_types = np.array(widget_types)
+    bboxes = np.array(bboxes).reshape(-1, 4)
+    if ratio != 1.0: bboxes = bboxes / ratio
+    sorted_indices = np.lexsort((bboxes[:, 0], bboxes[:, 1])) 
+    return bboxes[sorted_indices], widget_types[sorted_indices]
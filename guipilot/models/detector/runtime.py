@@ -0,0 +1,104 @@
+import os
+import ast
+
+import cv2
+import numpy as np
+
+from .ops import letterbox, unletterbox, nms
+
+
+def _fresh(path: str, source: str) -> bool:
+    return os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(source)
+
+
+def export_onnx(weights: str, quantize: bool = False, imgsz: int = 640) -> str:
+    """Export YOLO weights to ONNX once, the export is cached next to the weights
+
+    Args:
+        weights: path of the `.pt` weights
+        quantize: also quantize the weights to int8 (dynamic quantization), cached as `.int8.onnx`
+        imgsz: input size of the exported model
+
+    Returns:
+        path of the `.onnx` model, re-exported if the weights are newer
+    """
+    path = f"{os.path.splitext(weights)[0]}.onnx"
+    if not _fresh(path, weights):
+        from ultralytics import YOLO
+        exported = YOLO(weights).export(format="onnx", imgsz=imgsz, dynamic=True, verbose=False)
+        if os.path.abspath(exported) != os.path.abspath(path): os.replace(exported, path)
+    if not quantize: return path
+
+    int8_path = f"{os.path.splitext(weights)[0]}.int8.onnx"
+    if not _fresh(int8_path, path):
+        import onnx
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+
+        quantize_dynamic(path, int8_path, weight_type=QuantType.QUInt8)
+        # keep the class names and input size written by the export
+        model, quantized = onnx.load(path), onnx.load(int8_path)
+        del quantized.metadata_props[:]
+        quantized.metadata_props.extend(model.metadata_props)
+        onnx.save(quantized, int8_path)
+    return int8_path
+
+
+class OnnxModel():
+    """YOLO detector exported by `export_onnx()`, run with ONNX Runtime on CPU
+
+    Pre- and post-processing follow Ultralytics: letterbox to the input size, confidence
+    threshold on the best class score, per-class NMS.
+    """
+    def __init__(self, path: str, threads: int | None = None) -> None:
+        """
+        Params
+            path: `.onnx` model
+            threads: number of threads per inference, ONNX Runtime picks one per core if None
+        """
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads or 0
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.names: dict[int, str] = ast.literal_eval(metadata["names"])
+        self.imgsz = int(ast.literal_eval(metadata.get("imgsz", "[640]"))[0])
+
+    def predict(
+        self,
+        images: list[np.ndarray],
+        conf: float = 0.25,
+        iou: float = 0.7,
+        max_det: int = 300
+    ) -> list[tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """Detect objects on BGR images, predicted as one batch
+
+        Returns:
+            `(xyxy, scores, class_ids)` of each image, in the image's coordinates
+        """
+        if len(images) == 0: return []
+        inputs, transforms = [], []
+        for image in images:
+            padded, ratio, pad = letterbox(image, self.imgsz)
+            inputs.append(cv2.cvtColor(padded, cv2.COLOR_BGR2RGB))
+            transforms.append((ratio, pad, image.shape))
+        batch = np.ascontiguousarray(np.stack(inputs).transpose(0, 3, 1, 2), dtype=np.float32) / 255
+        outputs = self.session.run(None, {self.input_name: batch})[0]  # (b, 4 + classes, anchors)
+
+        results = []
+        for output, (ratio, pad, shape) in zip(outputs, transforms):
+            output = output.T
+            class_scores = output[:, 4:]
+            class_ids = class_scores.argmax(axis=1)
+            scores = class_scores[np.arange(len(output)), class_ids]
+            candidates = scores > conf
+            boxes, scores, class_ids = output[candidates, :4], scores[candidates], class_ids[candidates]
+
+            xyxy = np.concatenate([boxes[:, :2] - boxes[:, 2:] / 2, boxes[:, :2] + boxes[:, 2:] / 2], axis=1)
+            keep = nms(xyxy, scores, iou, class_ids, max_det)
+            xyxy = unletterbox(xyxy[keep], ratio, pad, shape)
+            results.append((xyxy.astype(np.float32), scores[keep], class_ids[keep].astype(np.float32)))
+        return results
@@ -11,6 +11,9 @@ import numpy as np
 import os, shutil
 from PIL import Image
 import json
+import cv2
+from timeit import default_timer as timer
+from ..runtime import OnnxModel, export_onnx
 
 
 def create_coco_json(annotation_list, label2id, output_json_path, coco_format):
@@ -88,6 +91,9 @@ if __name__ == '__main__':
     parser.add_argument('--prepare_data', default=False, action='store_true')
     parser.add_argument('--do_train', default=False, action='store_true')
     parser.add_argument('--do_test', default=False, action='store_true')
+    parser.add_argument('--runtime', type=str, default='torch', help="how to run the model for testing",
+                        choices=['torch', 'onnx', 'onnx-int8'])
+    parser.add_argument('--threads', type=int, default=None, help="number of CPU threads for onnx runtimes")
     args = parser.parse_args()
 
     # Load the YAML file
@@ -200,7 +206,11 @@ if __name__ == '__main__':
         )
 
     if args.do_test:
-        model = YOLO(f'./runs/detect/{args.model_name}/weights/best.pt')
+        weights = f'./runs/detect/{args.model_name}/weights/best.pt'
+        if args.runtime == 'torch':
+            model = YOLO(weights)
+        else:
+            model = OnnxModel(export_onnx(weights, quantize=args.runtime == 'onnx-int8'), args.threads)
         with open(args.json_test, 'rb') as handle:
             coco_format = json.load(handle)
 
@@ -208,6 +218,7 @@ if __name__ == '__main__':
         category_dict = {cat['name']: cat['id'] for cat in coco_format['categories']}
 
         predictions = []
+        times = []
 
         for ct, app_dir in enumerate(sorted(os.listdir(ground_truth_dir))):
             for file in os.listdir(os.path.join(ground_truth_dir, app_dir)):
@@ -215,11 +226,17 @@ if __name__ == '__main__':
                     image_name = os.path.join(ground_truth_dir, app_dir, file)
 
                     if image_name in image_dict:
-                        results = model.predict(image_name, max_det=100, conf=0.01)
-                        boxes = results[0].boxes
-                        scores = boxes.conf.cpu().numpy()
-                        classes = [results[0].names[i] for i in boxes.cls.cpu().numpy()]
-                        xyxys = boxes.xyxy.cpu().numpy()
+                        start_time = timer()
+                        if args.runtime == 'torch':
+                            results = model.predict(image_name, max_det=100, conf=0.01)
+                            boxes = results[0].boxes
+                            scores = boxes.conf.cpu().numpy()
+                            classes = [results[0].names[i] for i in boxes.cls.cpu().numpy()]
+                            xyxys = boxes.xyxy.cpu().numpy()
+                        else:
+                            xyxys, scores, class_ids = model.predict([cv2.imread(image_name)], max_det=100, conf=0.01)[0]
+                            classes = [model.names[int(i)] for i in class_ids]
+                        times.append(timer() - start_time)
 
                         # Add prediction info
                         for it in range(len(scores)):
@@ -233,16 +250,17 @@ if __name__ == '__main__':
                             predictions.append(prediction)
 
         # Write the prediction data to a JSON file
-        with open(f"./datasets/80app_test_predict_{args.model_name}.json", 'w') as json_file:
+        with open(f"./datasets/80app_test_predict_{args.model_name}_{args.runtime}.json", 'w') as json_file:
             json.dump(predictions, json_file)
 
         '''Evaluate results'''
         cocoGt = COCO(args.json_test)  # Load the ground truth
         cat_names = {cat['id']: cat['name'] for cat in cocoGt.loadCats(cocoGt.getCatIds())}
-        cocoDt = cocoGt.loadRes(f"./datasets/80app_test_predict_{args.model_name}.json")  # Load your results
+        cocoDt = cocoGt.loadRes(f"./datasets/80app_test_predict_{args.model_name}_{args.runtime}.json")  # Load your results
         print(f"Number of testing samples = {len(cocoDt.dataset['images'])}")
         cocoEval = COCOeval(cocoGt, cocoDt, 'bbox')
         cocoEval.params.iouThrs = np.asarray([0.5])
         cocoEval.evaluate()
         cocoEval.accumulate()
-        cocoEval.summarize()
\ No newline at end of file
+        cocoEval.summarize()
+        print(f"Runtime = {args.runtime}, mean latency = {np.mean(times) * 1000:.1f} ms, p95 latency = {np.percentile(times, 95) * 1000:.1f} ms")
\ No newline at end of file
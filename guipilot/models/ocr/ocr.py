@@ -1,16 +1,56 @@
-import base64
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, ProcessPoolExecutor
 
 import cv2
 import requests
 import numpy as np
-from paddleocr import PaddleOCR 
+
+from ..cache import ResultCache, image_key
+from ..transport import Transport, AsyncLimiter, default_transport, encode_image, encode_images, batch_results, ENCODINGS
 
 
 class OCR():
-    def __init__(self, service_url: str = None) -> None:
+    def __init__(
+        self, 
+        service_url: str = None, 
+        transport: Transport = None, 
+        encoding: str = "jpeg", 
+        batch_url: str = None,
+        cache_size: int = 4096,
+        cache_path: str = None,
+        workers: int = 1,
+        concurrency: int = 8
+    ) -> None:
+        """
+        Params
+            service_url: URL of the model service, the model is run locally if None
+            transport: HTTP client for the service, defaults to a shared connection pool
+            encoding: how images are sent to the service, see `transport.ENCODINGS`
+            batch_url: URL of the service's batch endpoint, defaults to `{service_url}/batch`
+            cache_size: number of results cached in memory by image content, see `cache.ResultCache`
+            cache_path: sqlite file to also cache results on disk, across runs
+            workers: number of micro-batches run concurrently by `batch()`, on threads for the 
+                service and on processes with a PaddleOCR replica each for the local backend
+            concurrency: maximum number of requests in flight from `acall()` and `abatch()`, 
+                the local backend runs one call at a time
+        """
+        assert encoding in ENCODINGS, f"unknown image encoding: {encoding}"
         self.service_url = service_url
+        self.batch_url = batch_url if batch_url is not None or service_url is None else f"{service_url.rstrip('/')}/batch"
+        self.encoding = encoding
+        self.transport = transport if transport is not None else default_transport()
+        self.cache = ResultCache(cache_size, cache_path) if cache_size > 0 or cache_path is not None else None
+        self.config = ("ocr", service_url or "paddleocr", encoding)
+        self.workers = workers
+        self._executor: Executor | None = None
+        self._executor_workers = 0
+        self.limiter = AsyncLimiter(concurrency if service_url is not None else 1)
 
         if service_url is None:
+            # heavy import, only needed for the local backend
+            from paddleocr import PaddleOCR
+
             self.ocr = PaddleOCR(lang="ch", show_log=False, use_gpu=True)
 
     def _local(self, image: np.ndarray) -> tuple[list, list]:
@@ -31,14 +71,224 @@ class OCR():
         
         return texts, text_bboxes
 
-    def __call__(self, image: np.ndarray) -> tuple[list, list]:
-        if self.service_url is None: return self._local(image)
+    def _local_batch(self, images: list[np.ndarray]) -> list[tuple[list, list] | Exception]:
+        """Detect text in each image, then recognize the text lines of all images in one batch
+
+        Lines are kept in PaddleOCR's reading order and filtered by its `drop_score`, as in `_local`. 
+        If the batched recognition fails, each image falls back to `_local`.
+        """
+        # added to the path by paddleocr, which orders lines the same way in `_local`
+        from tools.infer.predict_system import sorted_boxes
+
+        results, quads = [], []
+        for image in images:
+            try:
+                image = np.ascontiguousarray(image)
+                boxes = self.ocr.ocr(image, rec=False, cls=False)[0] or []
+                results.append(sorted_boxes(np.asarray(boxes, dtype=np.float32).reshape(-1, 4, 2)))
+                quads.extend((len(results) - 1, image, box) for box in results[-1])
+            except Exception as e:
+                results.append(e)
 
-        _, buffer = cv2.imencode(".jpg", image)
-        img_base64 = base64.b64encode(buffer).decode('utf-8')
-        response = requests.post(self.service_url, data={"image_array": img_base64})
-        data: dict = response.json()
+        lines = [_crop_quad(image, box) for _, image, box in quads]
+        try:
+            recognized = self.ocr.ocr(lines, det=False, cls=False)[0] if lines else []
+        except Exception:
+            outputs = []
+            for image, result in zip(images, results):
+                try:
+                    outputs.append(result if isinstance(result, Exception) else self._local(image))
+                except Exception as e:
+                    outputs.append(e)
+            return outputs
+
+        outputs = [([], []) if not isinstance(result, Exception) else result for result in results]
+        for (i, _, box), (text, score) in zip(quads, recognized):
+            if score < self.ocr.args.drop_score: continue
+            xmin, ymin = box.min(axis=0).tolist()
+            xmax, ymax = box.max(axis=0).tolist()
+            outputs[i][0].append(text)
+            outputs[i][1].append([xmin, ymin, xmax, ymax])
+
+        return outputs
+
+    def _service(self, image: np.ndarray) -> tuple[list, list]:
+        data: dict = self.transport.post(self.service_url, **encode_image(image, self.encoding))
         texts = data.get("text")
         text_bboxes = data.get("box")
 
-        return texts, text_bboxes
\ No newline at end of file
+        return texts, text_bboxes
+
+    def _service_batch(self, images: list[np.ndarray]) -> list[tuple[list, list] | Exception]:
+        """Send images in one request to the batch endpoint, falls back to a request per image
+        
+        The batch endpoint responds with per-image lists `{"text": [[...], ...], "box": [[...], ...]}`, 
+        with `null` entries for images it failed on.
+
+        Raises:
+            RuntimeError: if the response does not have one entry per image
+        """
+        request = None
+        if self.batch_url is not None:
+            try:
+                request = encode_images(images, self.encoding)
+            except Exception:
+                pass  # e.g. an image that cannot be encoded, find it with a request per image
+
+        if request is not None:
+            try:
+                data: dict = self.transport.post(self.batch_url, **request)
+            except requests.HTTPError as e:
+                if e.response.status_code not in (404, 405, 501): raise
+                self.batch_url = None  # batching is not supported by the service
+            else:
+                return [
+                    (texts, text_bboxes) if texts is not None else RuntimeError("OCR service failed on image")
+                    for texts, text_bboxes in batch_results(data, ("text", "box"), len(images))
+                ]
+
+        results = []
+        for image in images:
+            try:
+                results.append(self._service(image))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def __call__(self, image: np.ndarray) -> tuple[list, list]:
+        key = image_key(image, *self.config) if self.cache is not None else None
+        if key is not None:
+            result = self.cache.get(key)
+            if result is not None: return tuple(result)
+
+        result = self._local(image) if self.service_url is None else self._service(image)
+        if key is not None: self.cache.put(key, result)
+        return result
+
+    def _get_executor(self, workers: int) -> Executor:
+        """Pool of `workers`, kept across calls so that local replicas are only loaded once
+
+        The service is called from threads sharing the transport's connection pool. PaddleOCR 
+        is not thread-safe, so the local backend runs a replica in each spawned process.
+        """
+        if self._executor is None or self._executor_workers != workers:
+            if self._executor is not None: self._executor.shutdown()
+            if self.service_url is None:
+                # forked processes may inherit locked state of the parent's model
+                context = multiprocessing.get_context("spawn")
+                self._executor = ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker)
+            else:
+                self._executor = ThreadPoolExecutor(workers)
+            self._executor_workers = workers
+        return self._executor
+
+    def close(self) -> None:
+        """Shut down the worker pool of `batch()`, the shared transport is left open
+        """
+        if self._executor is not None: self._executor.shutdown()
+        self._executor, self._executor_workers = None, 0
+
+    def __enter__(self) -> "OCR":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def batch(
+        self, 
+        images: list[np.ndarray], 
+        batch_size: int = 32, 
+        workers: int = None
+    ) -> list[tuple[list, list] | Exception]:
+        """Run OCR on images in micro-batches of `batch_size`, cached images are not sent
+
+        Args:
+            images: images to run OCR on
+            batch_size: number of images per request, or per local recognition batch
+            workers: number of micro-batches run concurrently, defaults to `self.workers`
+
+        Returns:
+            `(texts, text_bboxes)` of each image, in order. An image that fails is returned 
+            as its exception, so that the results of the other images are kept.
+        """
+        assert batch_size > 0
+        workers = workers if workers is not None else self.workers
+        assert workers > 0
+        results: list = [None] * len(images)
+        keys = [image_key(image, *self.config) for image in images] if self.cache is not None else None
+        if keys is not None:
+            for i, key in enumerate(keys):
+                result = self.cache.get(key)
+                if result is not None: results[i] = tuple(result)
+        misses = [i for i, result in enumerate(results) if result is None]
+        chunks = [misses[start:start + batch_size] for start in range(0, len(misses), batch_size)]
+
+        def run(chunk: list[int]) -> list[tuple[list, list] | Exception]:
+            try:
+                if self.service_url is not None: return self._service_batch([images[i] for i in chunk])
+                return self._local_batch([images[i] for i in chunk])
+            except Exception as e:
+                return [e] * len(chunk)
+
+        # chunks run concurrently, results are collected in submission order
+        if workers == 1 or len(chunks) <= 1:
+            chunk_results = map(run, chunks)
+        elif self.service_url is not None:
+            chunk_results = self._get_executor(workers).map(run, chunks)
+        else:
+            executor = self._get_executor(workers)
+            futures = [executor.submit(_run_worker, [images[i] for i in chunk]) for chunk in chunks]
+            chunk_results = (_result(future, len(chunk)) for future, chunk in zip(futures, chunks))
+
+        for chunk, chunk_result in zip(chunks, chunk_results):
+            for i, result in zip(chunk, chunk_result):
+                results[i] = result
+                if keys is not None and not isinstance(result, Exception): self.cache.put(keys[i], result)
+        return results
+
+    async def acall(self, image: np.ndarray) -> tuple[list, list]:
+        """`__call__()` in a worker thread, off the event loop, under the concurrency limit, see `AsyncLimiter`
+        """
+        return await self.limiter.run(self, image)
+
+    async def abatch(self, images: list[np.ndarray], batch_size: int = 32) -> list[tuple[list, list] | Exception]:
+        """`batch()` with micro-batches run in worker threads, awaited concurrently under the concurrency limit
+        """
+        assert batch_size > 0
+        chunks = [images[start:start + batch_size] for start in range(0, len(images), batch_size)]
+        chunk_results = await asyncio.gather(*[self.limiter.run(self.batch, chunk, batch_size, 1) for chunk in chunks])
+        return [result for chunk_result in chunk_results for result in chunk_result]
+
+
+# PaddleOCR replica of a process pool worker, see `OCR.batch()`
+_worker_ocr: OCR | None = None
+
+
+def _init_worker() -> None:
+    global _worker_ocr
+    _worker_ocr = OCR(service_url=None, cache_size=0)
+
+
+def _run_worker(images: list[np.ndarray]) -> list[tuple[list, list] | Exception]:
+    return _worker_ocr._local_batch(images)
+
+
+def _result(future: Future, n: int) -> list[tuple[list, list] | Exception]:
+    try:
+        return future.result()
+    except Exception as e:
+        return [e] * n
+
+
+def _crop_quad(image: np.ndarray, box: np.ndarray) -> np.ndarray:
+    """Crop a text quadrilateral into an upright rectangle, as PaddleOCR does before recognition
+    """
+    width = max(int(max(np.linalg.norm(box[0] - box[1]), np.linalg.norm(box[2] - box[3]))), 1)
+    height = max(int(max(np.linalg.norm(box[0] - box[3]), np.linalg.norm(box[1] - box[2]))), 1)
+    target = np.float32([[0, 0], [width, 0], [width, height], [0, height]])
+    crop = cv2.warpPerspective(
+        image, cv2.getPerspectiveTransform(box, target), (width, height), 
+        borderMode=cv2.BORDER_REPLICATE, flags=cv2.INTER_CUBIC
+    )
+    if crop.shape[0] >= crop.shape[1] * 1.5: crop = np.rot90(crop)
+    return crop
\ No newline at end of file
@@ -0,0 +1,61 @@
+from __future__ import annotations
+import os
+import importlib
+import threading
+from typing import Any, Callable
+
+
+# name -> model factory or its "module:attribute" path, and the keyword arguments it is created with
+# paths are imported on first `get()`, so that importing the registry does not import any backend
+_factories: dict[str, Callable[..., Any] | str] = {
+    "ocr": "guipilot.models.ocr.ocr:OCR",
+    "detector": "guipilot.models.detector.detector:Detector"
+}
+_configs: dict[str, dict[str, Any]] = {
+    "ocr": {"service_url": os.getenv("GUIPILOT_OCR_URL", "http://localhost:5000/detect")},
+    "detector": {"service_url": os.getenv("GUIPILOT_DETECTOR_URL", "http://localhost:6000/detect")}
+}
+_models: dict[str, Any] = {}
+_lock = threading.RLock()  # models are created once, also when first fetched from several threads
+
+
+def register(name: str, factory: Callable[..., Any] | str, **kwargs) -> None:
+    """Register a model factory, replacing any existing model of the same name
+
+    Args:
+        name: name the model is fetched by, see `get()`
+        factory: callable that creates the model, or its "module:attribute" path
+        kwargs: arguments to create the model with
+    """
+    _factories[name] = factory
+    _configs[name] = kwargs
+    _models.pop(name, None)
+
+
+def configure(name: str, **kwargs) -> None:
+    """Update the arguments a model is created with, the model is recreated on next `get()`
+
+    Example:
+        configure("ocr", service_url=None)  # use the local PaddleOCR backend
+        configure("detector", service_url="http://gpu-host:6000/detect")
+    """
+    if name not in _factories: raise KeyError(f"unknown model: {name}")
+    _configs[name].update(kwargs)
+    _models.pop(name, None)
+
+
+def get(name: str) -> Any:
+    """Get a model, creating it on first use
+    """
+    model = _models.get(name)
+    if model is not None: return model
+    with _lock:
+        model = _models.get(name)
+        if model is None:
+            if name not in _factories: raise KeyError(f"unknown model: {name}")
+            factory = _factories[name]
+            if isinstance(factory, str):
+                module, attribute = factory.split(":")
+                factory = _factories[name] = getattr(importlib.import_module(module), attribute)
+            model = _models[name] = factory(**_configs[name])
+    return model
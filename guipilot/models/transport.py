@@ -0,0 +1,206 @@
+from __future__ import annotations
+import base64
+import asyncio
+import weakref
+import threading
+from typing import Any, Callable
+
+import cv2
+import requests
+import numpy as np
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# image encodings sent to model services
+# "jpeg" is the base64 JPEG form field `image_array`, the others are sent as an `application/octet-stream`
+# body with `X-Image-Encoding` and `X-Image-Shape` (height,width,channels) headers
+ENCODINGS = ("jpeg", "png", "webp", "raw")
+LOSSLESS_ENCODINGS = ("png", "webp", "raw")
+
+
+def _encode(image: np.ndarray, encoding: str) -> tuple[bytes, str]:
+    """Encode an image to binary, returns the bytes and the `h,w,c` shape
+    """
+    if encoding == "raw":
+        body = np.ascontiguousarray(image, dtype=np.uint8).tobytes()
+    elif encoding == "png":
+        _, body = cv2.imencode(".png", image)
+    elif encoding == "webp":
+        _, body = cv2.imencode(".webp", image, [cv2.IMWRITE_WEBP_QUALITY, 101])  # quality > 100 is lossless
+    else:
+        raise ValueError(f"unknown image encoding: {encoding}, expected one of {ENCODINGS}")
+
+    shape = image.shape if image.ndim == 3 else (*image.shape, 1)
+    return bytes(body), ",".join(map(str, shape))
+
+
+def _decode(body: bytes, encoding: str, shape: str) -> np.ndarray:
+    height, width, channels = map(int, shape.split(","))
+    buffer = np.frombuffer(body, dtype=np.uint8)
+    if encoding == "raw":
+        image = buffer.reshape(height, width, channels)
+    else:
+        image = cv2.imdecode(buffer, cv2.IMREAD_UNCHANGED).reshape(height, width, channels)
+    return image if channels > 1 else image[:, :, 0]
+
+
+def _jpeg_base64(image: np.ndarray) -> str:
+    _, buffer = cv2.imencode(".jpg", image)
+    return base64.b64encode(buffer).decode('utf-8')
+
+
+def encode_image(image: np.ndarray, encoding: str = "jpeg") -> dict:
+    """Encode an image as keyword arguments for `Transport.post()`
+
+    Args:
+        image: `(h, w)` or `(h, w, c)` uint8 image
+        encoding: one of `ENCODINGS`, "png", "webp" (lossless) and "raw" preserve pixels exactly
+    """
+    if encoding == "jpeg": return {"data": {"image_array": _jpeg_base64(image)}}
+
+    body, shape = _encode(image, encoding)
+    headers = {"Content-Type": "application/octet-stream", "X-Image-Encoding": encoding, "X-Image-Shape": shape}
+    return {"data": body, "headers": headers}
+
+
+def encode_images(images: list[np.ndarray], encoding: str = "jpeg") -> dict:
+    """Encode several images into one request, as keyword arguments for `Transport.post()`
+
+    "jpeg" repeats the `image_array` form field. Binary encodings concatenate the images, 
+    with `;`-separated `X-Image-Shape` and `,`-separated byte lengths in `X-Image-Sizes`.
+    """
+    if encoding == "jpeg": return {"data": {"image_array": [_jpeg_base64(image) for image in images]}}
+
+    bodies, shapes = zip(*[_encode(image, encoding) for image in images]) if images else ((), ())
+    headers = {
+        "Content-Type": "application/octet-stream",
+        "X-Image-Encoding": encoding,
+        "X-Image-Shape": ";".join(shapes),
+        "X-Image-Sizes": ",".join(str(len(body)) for body in bodies)
+    }
+    return {"data": b"".join(bodies), "headers": headers}
+
+
+def decode_image(body: bytes, headers: dict) -> np.ndarray:
+    """Decode a binary image request body, for services receiving from `encode_image()`
+    """
+    return _decode(body, headers.get("X-Image-Encoding", "raw"), headers["X-Image-Shape"])
+
+
+def decode_images(body: bytes, headers: dict) -> list[np.ndarray]:
+    """Decode a binary request body of several images, for services receiving from `encode_images()`
+    """
+    if not headers.get("X-Image-Sizes"): return []
+    encoding = headers.get("X-Image-Encoding", "raw")
+    sizes = list(map(int, headers["X-Image-Sizes"].split(",")))
+    offsets = np.cumsum([0] + sizes)
+    return [
+        _decode(body[start:end], encoding, shape)
+        for start, end, shape in zip(offsets[:-1], offsets[1:], headers["X-Image-Shape"].split(";"))
+    ]
+
+
+def batch_results(data: dict, fields: tuple[str, ...], n: int) -> list[tuple]:
+    """Split a batch endpoint response into per-image tuples of `fields`, for `n` images sent
+
+    Raises:
+        RuntimeError: if a field is missing or does not have one entry per image
+    """
+    columns = [data.get(field) for field in fields]
+    for field, column in zip(fields, columns):
+        if not isinstance(column, list) or len(column) != n:
+            size = len(column) if isinstance(column, list) else type(column).__name__
+            raise RuntimeError(f"batch response field {field!r} has {size} entries for {n} images")
+    return list(zip(*columns))
+
+
+class Transport():
+    """HTTP client for model services, with a pool of keep-alive connections
+
+    One transport can be shared by several models and threads.
+    """
+    def __init__(
+        self,
+        pool_size: int = 16,
+        connect_timeout: float = 3.0,
+        read_timeout: float = 30.0,
+        retries: int = 3,
+        backoff: float = 0.2
+    ) -> None:
+        """
+        Params
+            pool_size: maximum number of connections kept alive per host
+            connect_timeout, read_timeout: timeouts in seconds
+            retries: number of retries on connection errors and 502, 503, 504 responses
+            backoff: retries sleep for `backoff * 2 ** (retry - 1)` seconds
+        """
+        self.timeout = (connect_timeout, read_timeout)
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=None,  # model requests are idempotent, retry POST as well
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def post(self, url: str, **kwargs) -> dict:
+        """Send a POST request, returns the decoded JSON response
+
+        Raises:
+            requests.HTTPError: if the service responds with an error status
+        """
+        response = self.session.post(url, timeout=self.timeout, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class AsyncLimiter():
+    """Run blocking model calls from asyncio code in worker threads, at most `limit` at once per event loop
+
+    This is a thread-offload wrapper, not an async client: each call still holds a thread of the 
+    loop's default executor for its whole request, and shares the models' transports, caches and 
+    retries. Each event loop gets its own semaphore, kept until the loop is closed, so event loops 
+    running at the same time in different threads allow `limit` calls each.
+    """
+    def __init__(self, limit: int) -> None:
+        """
+        Params
+            limit: maximum number of calls in flight per event loop
+        """
+        assert limit > 0
+        self.limit = limit
+        self._semaphores: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()  # loops in different threads may add their semaphore at once
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """Await `fn(*args)` in a worker thread once fewer than `limit` calls are in flight on this loop
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                # a semaphore that was waited on references its loop, drop those of closed loops
+                for closed in [other for other in self._semaphores if other.is_closed()]:
+                    del self._semaphores[closed]
+                semaphore = self._semaphores[loop] = asyncio.Semaphore(self.limit)
+        async with semaphore:
+            return await asyncio.to_thread(fn, *args)
+
+
+_default: Transport | None = None
+
+
+def default_transport() -> Transport:
+    """Transport shared by models that are not given one
+    """
+    global _default
+    if _default is None: _default = Transport()
+    return _default
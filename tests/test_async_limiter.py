@@ -0,0 +1,45 @@
+import time
+import asyncio
+import threading
+
+from guipilot.models.transport import AsyncLimiter
+
+
+def run_calls(limiter: AsyncLimiter, n: int) -> int:
+    """Await `n` calls on a new event loop, returns the most calls in flight at once
+    """
+    lock, in_flight, peak = threading.Lock(), [0], [0]
+
+    def call() -> None:
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(0.01)
+        with lock: in_flight[0] -= 1
+
+    async def main() -> None:
+        await asyncio.gather(*[limiter.run(call) for _ in range(n)])
+
+    asyncio.run(main())
+    return peak[0]
+
+
+def test_limit_holds_on_each_loop():
+    limiter = AsyncLimiter(2)
+    assert run_calls(limiter, 8) == 2
+    assert run_calls(limiter, 8) == 2
+
+
+def test_loops_in_threads_keep_their_own_semaphore():
+    limiter = AsyncLimiter(2)
+    peaks = []
+    threads = [threading.Thread(target=lambda: peaks.append(run_calls(limiter, 8))) for _ in range(3)]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    assert peaks == [2, 2, 2]
+
+
+def test_semaphores_of_closed_loops_are_dropped():
+    limiter = AsyncLimiter(1)
+    for _ in range(3): run_calls(limiter, 3)
+    assert len(limiter._semaphores) <= 1
@@ -0,0 +1,90 @@
+import random
+
+import numpy as np
+import pytest
+
+from guipilot.entities import Bbox, Widget, WidgetType, Screen
+from guipilot.matcher import GUIPilotV2, GVT
+
+
+def random_screen(n: int, height: int = 2400, width: int = 1080, seed: int = 0) -> Screen:
+    """Screen with `n` random, y-sorted widgets on a blank image
+    """
+    rng = random.Random(seed)
+    bboxes = []
+    for _ in range(n):
+        w, h = rng.randint(20, width // 2), rng.randint(20, 200)
+        xmin, ymin = rng.randint(0, width - w), rng.randint(0, height - h)
+        bboxes.append(Bbox(xmin, ymin, xmin + w, ymin + h))
+    bboxes.sort(key=lambda bbox: (bbox.ymin, bbox.xmin))
+    widgets = {i: Widget(type=rng.choice(list(WidgetType)), bbox=bbox) for i, bbox in enumerate(bboxes)}
+    return Screen(np.full((height, width, 3), 255, dtype=np.uint8), widgets)
+
+
+def perturb_screen(screen: Screen, p: float = 0.1, max_shift: int = 30, seed: int = 0) -> Screen:
+    """Copy of a screen with every widget jittered and a fraction `p` of them dropped
+    """
+    rng = random.Random(seed)
+    height, width, _ = screen.image.shape
+    widgets = {}
+    for id, widget in screen.widgets.items():
+        if rng.random() < p: continue
+        xmin, ymin, xmax, ymax = widget.bbox
+        dx = min(max(rng.randint(-max_shift, max_shift), -xmin), width - xmax)
+        dy = min(max(rng.randint(-max_shift, max_shift), -ymin), height - ymax)
+        widgets[id] = Widget(type=widget.type, bbox=Bbox(xmin + dx, ymin + dy, xmax + dx, ymax + dy))
+    return Screen(screen.image.copy(), widgets)
+
+
+@pytest.fixture(params=[1, 30, 120])
+def screen_pair(request) -> tuple[Screen, Screen]:
+    screen = random_screen(request.param, seed=request.param)
+    return screen, perturb_screen(screen, seed=request.param)
+
+
+def test_match_scores_are_bit_identical(screen_pair):
+    matcher = GUIPilotV2()
+    expected = matcher._calculate_match_scores_reference(*screen_pair)
+    actual = matcher._calculate_match_scores(*screen_pair)
+    assert expected.shape == actual.shape
+    assert np.array_equal(expected.view(np.uint64), actual.view(np.uint64))
+
+
+def test_alignment_paths_are_identical(screen_pair):
+    matcher = GUIPilotV2()
+    scores = matcher._calculate_match_scores(*screen_pair)
+    assert matcher._find_longest_matching_subsequence(scores) == matcher._find_longest_matching_subsequence_reference(scores)
+
+
+def test_alignment_of_empty_scores():
+    matcher = GUIPilotV2()
+    assert matcher._find_longest_matching_subsequence(np.zeros((0, 3))) == []
+
+
+def test_linear_space_matches_dense(screen_pair):
+    expected, _, _ = GUIPilotV2().match(*screen_pair)
+    actual, _, _ = GUIPilotV2(max_cells=64).match(*screen_pair)
+    assert actual == expected
+
+
+def test_gvt_matches_reference(screen_pair):
+    matcher = GVT(0.1)
+    expected, actual = matcher._match_reference(*screen_pair), matcher.match(*screen_pair)
+    assert actual[:2] == expected[:2]
+
+
+@pytest.mark.parametrize("matcher", [GUIPilotV2(), GVT(0.1)], ids=["guipilot", "gvt"])
+def test_match_many_matches_serial(matcher):
+    screen_pairs = []
+    for seed in range(12):
+        screen = random_screen(10 + 7 * seed, seed=seed)
+        screen_pairs.append((screen, perturb_screen(screen, seed=seed)))
+    expected = [matcher.match(screen_i, screen_j)[0] for screen_i, screen_j in screen_pairs]
+    assert [pairs for pairs, _, _ in matcher.match_many(screen_pairs, batch_size=4)] == expected
+
+
+def test_verified_band_matches_full(screen_pair):
+    expected, _, _ = GUIPilotV2().match(*screen_pair)
+    actual, _, _, touched = GUIPilotV2(band=2, verify_band=True).match_banded(*screen_pair)
+    assert not touched
+    assert actual == expected
@@ -0,0 +1,42 @@
+import numpy as np
+
+from guipilot.entities import Bbox, Widget, WidgetType, Screen
+
+
+def test_clone_leaves_source_writable():
+    image = np.zeros((10, 10, 3), dtype=np.uint8)
+    source = Screen(image)
+    clone = source.clone()
+
+    assert source.image is image and image.flags.writeable
+    assert not clone.image.flags.writeable
+
+
+def test_edit_image_copies_shared_buffer():
+    image = np.zeros((10, 10, 3), dtype=np.uint8)
+    source = Screen(image)
+    clone = source.clone()
+
+    source.edit_image()[0, 0] = 1
+    clone.edit_image()[1, 1] = 2
+    assert clone.image[0, 0, 0] == 0 and source.image[1, 1, 0] == 0
+    assert image[0, 0, 0] == image[1, 1, 0] == 0
+
+
+def test_source_edits_in_place_once_clone_copied():
+    image = np.zeros((10, 10, 3), dtype=np.uint8)
+    source = Screen(image)
+    source.clone().edit_image()
+    assert source.edit_image() is image
+
+
+def test_incremental_ocr_compares_pixels_once_source_changed():
+    image = np.zeros((100, 100, 3), dtype=np.uint8)
+    widgets = {i: Widget(type=WidgetType.TEXT_VIEW, bbox=Bbox(0, 20 * i, 100, 20 * i + 10)) for i in range(3)}
+    source = Screen(image, widgets)
+    clone = source.clone()
+    clone.edit_image(clone.widgets[0].bbox)[:] = 255
+    source.edit_image(source.widgets[1].bbox)[:] = 255
+
+    _, rows, counts = clone._plan_ocr("widget", True, None, None)
+    assert rows == [0, 1] and counts["reused"] == 1
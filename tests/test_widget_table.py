@@ -0,0 +1,48 @@
+import numpy as np
+
+from guipilot.entities import Bbox, Widget, WidgetType, Screen
+
+
+def make_screen(*bboxes: Bbox) -> Screen:
+    widgets = {i: Widget(type=WidgetType.TEXT_VIEW, bbox=bbox) for i, bbox in enumerate(bboxes)}
+    return Screen(np.zeros((100, 100, 3), dtype=np.uint8), widgets)
+
+
+def stored(screen: Screen, id: int) -> tuple:
+    return tuple(screen.table.bboxes[list(screen.widgets).index(id)].tolist())
+
+
+def test_widget_from_another_screen_is_copied():
+    source, target = make_screen(Bbox(0, 0, 10, 10)), make_screen(Bbox(20, 20, 30, 30))
+    widget = source.widgets[0]
+    target.widgets[1] = widget
+    widget.bbox = Bbox(1, 1, 5, 5)
+
+    assert source.widgets[0].bbox == stored(source, 0) == (1, 1, 5, 5)
+    assert target.widgets[1].bbox == stored(target, 1) == (0, 0, 10, 10)
+    target.widgets[1].bbox = Bbox(2, 2, 6, 6)
+    assert source.widgets[0].bbox == stored(source, 0) == (1, 1, 5, 5)
+
+
+def test_screen_built_from_bound_widgets_copies_them():
+    source = make_screen(Bbox(0, 0, 10, 10))
+    target = Screen(source.image, source.widgets.copy())
+    target.widgets[0].bbox = Bbox(3, 3, 4, 4)
+    assert source.widgets[0].bbox == stored(source, 0) == (0, 0, 10, 10)
+
+
+def test_float_bboxes_are_kept():
+    bbox = Bbox(1.7, 2.5, 30.2, 40.9)
+    widget = Widget(type=WidgetType.TEXT_VIEW, bbox=bbox)
+    screen = Screen(np.zeros((100, 100, 3), dtype=np.uint8), {0: widget})
+    assert widget.bbox is bbox
+    assert stored(screen, 0) == bbox
+
+    screen.widgets[1] = Widget(type=WidgetType.TEXT_VIEW, bbox=Bbox(0.5, 0, 9.5, 9))
+    assert stored(screen, 1) == (0.5, 0, 9.5, 9)
+    assert screen._crops(screen.image, [0])[0].shape == (38, 29, 3)
+
+
+def test_integral_bboxes_read_back_as_ints():
+    screen = make_screen(Bbox(0, 0, 10, 10))
+    assert all(type(value) is int for value in screen.table.get(0).bbox)